@@ -10,6 +10,8 @@ from res.strings import main_icon
 from InputLogs.mvc.View.input_log_view import InputLogView
 from utils.file import FileEdit
 from utils.log.log_file import print_log
+from utils.notification import set_notifier
+from utils.pyqt_mods.message_box import message_box
 
 os.environ['input_data'] = os.getcwd() + '/InputData'
 os.environ['input_logs'] = os.getcwd() + '/Inputlogs'
@@ -67,6 +69,7 @@ class InputDataLogs(QWidget):
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    set_notifier(message_box)
     sys.excepthook = console_excepthook
     window = InputDataLogs()
     window.show()
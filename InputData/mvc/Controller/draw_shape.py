@@ -1,15 +1,14 @@
-import math
-
 import numpy as np
 from matplotlib import pyplot as plt
 
 from InputData.mvc.Controller.qt_matplotlib_connector import EditorController
 from InputData.mvc.Model.lithological_model import LithologicalModel
 from InputData.mvc.Model.lithology import Lithology
-from utils.geometry.point_in_polygon import check_polygon_in_polygon
+from utils.geometry.polygon_mask import rasterize_layer
 from utils.geometry.prepare_layers_for_plot_3d import data_for_plot_3d
-from utils.geometry.simplify_line import simplify_line
-from utils.transform_data_to_export import dict_update, transform_data
+from utils.geometry.simplify_line import simplify_lines
+from utils.occupancy import Occupancy
+from utils.transform_data_to_export import IntervalTable
 
 
 class Plot3d:
@@ -32,11 +31,14 @@ class Plot3d:
 
 class DrawPolygon:
     def __init__(self, data_map: LithologicalModel, plot3d=None):
-        self.repeat = {}
         self.map = data_map
+        self.repeat = self.create_occupancy()
         self.all_polygon = np.zeros([1, 1, 1], dtype=bool)
         self.plot3d = plot3d if plot3d else Plot3d()
 
+    def create_occupancy(self) -> Occupancy:
+        return Occupancy(self.map.size.x, self.map.size.y, self.map.size.z + 1)
+
     def update_limits(self):
         x_size, y_size, z_size = self.map.size.x, self.map.size.y, self.map.size.z
         self.plot3d.ax.set_xlim3d(xmin=0.000001, xmax=x_size * 1.1)
@@ -60,35 +62,27 @@ class DrawPolygon:
         self.map.data = {}
         for shape in shapes:
             # roof_profile_offset
-            base_size = max(self.map.size.x, self.map.size.y)
-
-            r_p_o = self.map.roof_profile.get_x_y_offset(base=base_size)
-            r_p_o = [[0 if shape.filler else j for j in i] for i in r_p_o]
+            r_p_o = self.map.roof_offset(shape)
 
             # include_not_primary
             if self.map.draw_speed == 'Simple':
-                i_n_t, _ = (True, shape.calc_intermediate_layers())
+                i_n_t, _ = (True, shape.update_intermediate_layers())
             else:
                 i_n_t, _ = (False, shape.delete_secondary_surface())
 
-            main_layers = [lay for lay in shape.layers if (lay.primary or i_n_t) and lay.x != []]
-
-            layers, layers_x, layers_y = [], [], []
-            base_dot_count = max([len(lay.scalable_curve[0]) for lay in main_layers] + [0])
-
-            for lay in main_layers:
-                a, b = simplify_line(lay.scalable_curve[0], lay.scalable_curve[1], base_dot_count)
-                layers_x.append(a)
-                layers_y.append(b)
-                layers.append((lay.z, a, b))
+            main_layers = [lay for lay in shape.layers if (lay.primary or i_n_t) and len(lay.dots)]
 
-            if not layers_x:
+            if not main_layers:
                 continue
 
-            ceil: () = lambda i, m: int(sorted([0, i, m - 1])[1])
+            curves = [lay.scaled_dots.T for lay in main_layers]
+            lines = simplify_lines(curves, max(len(x) for x, _ in curves))
+            layers_x, layers_y = lines[:, :, 0].tolist(), lines[:, :, 1].tolist()
 
-            layers_z = [[lay[0] + r_p_o[ceil(x1, self.map.size.x)][ceil(y1, self.map.size.y)]
-                         for x1, y1 in zip(lay[1], lay[2])] for lay in layers]
+            cells_x = np.clip(lines[:, :, 0], 0, self.map.size.x - 1).astype(int)
+            cells_y = np.clip(lines[:, :, 1], 0, self.map.size.y - 1).astype(int)
+            layers_z = (np.array([[lay.z] for lay in main_layers]) +
+                        r_p_o[cells_x, cells_y]).tolist()
 
             layers_x, layers_y, layers_z = data_for_plot_3d(layers_x, layers_y, layers_z)
             x, y, z = np.array(layers_x), np.array(layers_y), np.array(layers_z)
@@ -97,20 +91,21 @@ class DrawPolygon:
 
     def draw_all_polygon(self):
         self.plot3d.ax.clear()
-        self.repeat, self.map.data, main_data = {}, {}, []
+        self.repeat, main_data = self.create_occupancy(), []
+        intervals = IntervalTable(self.map.size.x, self.map.size.y)
         self.all_polygon = np.zeros([1, 1, 1], dtype=bool)
 
         for shape in self.map.get_visible_shapes():
-            shape.calc_intermediate_layers()
+            shape.update_intermediate_layers()
 
             data = self.calc_polygon_in_draw(shape)
-            self.map.data[f'{shape.name}|{shape.sub_name}'] = \
-                dict_update(self.map.data.get(shape.name), transform_data(data))
+            intervals.add_cube(f'{shape.name}|{shape.sub_name}', data)
 
             colors = np.empty(list(data.shape) + [4], dtype=np.float32)
             r, g, b = shape.color
             colors[:] = [r / 255, g / 255, b / 255, shape.alpha]
             main_data.append((data, colors))
+        self.map.data = intervals.to_dict()
         self.draw(main_data)
 
     def draw(self, main_data: []):
@@ -119,27 +114,18 @@ class DrawPolygon:
 
     # set visible polygon
     def calc_polygon_in_draw(self, fig: Lithology) -> []:
-        roof = self.map.roof_profile.get_x_y_offset(base=max(self.map.size.x, self.map.size.y))
-        roof = [[0 if fig.filler else j for j in i] for i in roof]
-        z_size = int(fig.height + max(a for b in roof for a in b) + 1)
+        roof = self.map.roof_offset(fig)
+        z_size = int(fig.height + roof.max() + 1)
+        roof = roof[:fig.size.x, :fig.size.y]
 
         data = np.zeros([self.map.size.x, self.map.size.y, z_size], dtype=bool)
 
         self.all_polygon.resize([max(x) for x in zip(data.shape, self.all_polygon.shape)])
 
-        lay_size = fig.size.x * fig.size.y
         for lay in fig.layers:
-            (x, y), lay_z = lay.scalable_curve, lay.z
-            for x1 in range(fig.size.x):
-                x1_c = math.ceil(x1)
-                xx, rpo_x = [x1_c, x1_c + 1, x1_c, x1_c + 1], roof[x1]
-                for y1 in range(fig.size.y):
-                    y1_c = math.ceil(y1)
-                    z1_offset, yy = int(lay_z + rpo_x[y1]), [y1_c, y1_c, y1_c + 1, y1_c + 1]
-                    if check_polygon_in_polygon(x, y, xx, yy):
-                        rep_name = lay_size * z1_offset + x1 * fig.size.y + y1
-                        if self.repeat.get(rep_name) is None and 0 <= z1_offset <= fig.size.z:
-                            self.repeat[rep_name] = True
-                            data[x1, y1, z1_offset] = True
+            (x, y), lay_z = lay.scaled_dots.T, lay.z
+            xs, ys, zs = rasterize_layer(x, y, lay_z, roof)
+            claimed = self.repeat.claim(xs, ys, zs)
+            data[xs[claimed], ys[claimed], zs[claimed]] = True
 
         return data
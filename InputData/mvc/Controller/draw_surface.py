@@ -5,13 +5,13 @@ import numpy as np
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 from matplotlib.ticker import AutoMinorLocator, MultipleLocator
-from scipy.interpolate import griddata
 
 from InputData.mvc.Model.roof_profile import RoofProfile
 from InputData.mvc.Model.surface import Surface
 from utils.geometry.nearest_dot import nearest_dot_index, nearest_line_index, dot_to_border
 # x - width, y - length
 from utils.geometry.simplify_line import simplify_line, polyline
+from utils.roof_interpolation import interpolate
 from res.strings import Limits
 
 
@@ -101,7 +101,7 @@ class EditSurface:
             x, y = simplify_line(x, y, dot_count)
         else:
             x, y = simplify_line(x, y)
-        self.surface.curve = x, y
+        self.surface.set_curve(x, y)
         self.update_plot()
 
     def halve_dot_count(self):
@@ -224,8 +224,7 @@ class EditRoofProfileSurface(EditSurface):
             base = Limits.BASE_PLOT_SCALE
             points, val = get_points_val(self.roof_profile)
             grid_x, grid_y = np.mgrid[0:base:25j, 0:base:25j]
-            grid_z = griddata(points, val, (grid_x, grid_y),
-                              method=self.roof_profile.interpolate_method)
+            grid_z = interpolate(points, val, grid_x, grid_y, self.roof_profile.interpolate_method)
 
             self.ax.imshow(grid_z.T, extent=(0, base, 0, base), origin='lower')
         for point, i in zip(self.roof_profile.points, range(len(self.roof_profile.points))):
@@ -237,8 +236,7 @@ class EditRoofProfileSurface(EditSurface):
             base = Limits.BASE_PLOT_SCALE
             points, val = get_points_val(self.roof_profile)
             grid_x, grid_y = np.mgrid[0:base:25j, 0:base:25j]
-            grid_z = griddata(points, val, (grid_x, grid_y),
-                              method=self.roof_profile.interpolate_method)
+            grid_z = interpolate(points, val, grid_x, grid_y, self.roof_profile.interpolate_method)
 
             fig = plt.figure()
             ax = fig.add_subplot(projection='3d')
@@ -76,6 +76,8 @@ class EditorController(FigureCanvasQTAgg):
             self.mode = Preview(self.plot, self.kwargs.get('preview_click_handler'))
 
     def on_click(self, event):
+        if self.plot.surface:
+            self.plot.surface.memento.begin()
         self.handler_move_id = self.mpl_connect('motion_notify_event', self.on_move)
         self.mode.on_click(event)
         self.draw()
@@ -87,6 +89,8 @@ class EditorController(FigureCanvasQTAgg):
     def on_release(self, event):
         self.mode.on_release(event)
         self.mpl_disconnect(self.handler_move_id)
+        if self.plot.surface:
+            self.plot.surface.memento.end()
         self.draw()
 
 
@@ -174,7 +178,7 @@ class EditorSurfaceController(EditorController):
             pre_lay = self.lithology.layers[index]
             lay = self.lithology.insert_layer(index + 1 if edit_method == 'add_post' else index)
             if lay:
-                lay.x, lay.y = pre_lay.x.copy(), pre_lay.y.copy()
+                lay.curve = pre_lay.dots.T
 
         elif edit_method == 'del':
             self.lithology.pop_layer(index)
@@ -198,8 +202,10 @@ class EditorSurfaceController(EditorController):
         self.change_lay(lay=lay)
 
     def change_lay(self, index: int = None, lay: Surface = None):
+        if lay in self.lithology.layers:
+            index = self.lithology.layers.index(lay)
         if index in range(0, len(self.lithology.layers)):
-            super(EditorSurfaceController, self).change_lay(self.lithology.layers[index])
+            super(EditorSurfaceController, self).change_lay(self.lithology.get_surface(index))
         elif lay:
             super(EditorSurfaceController, self).change_lay(lay)
 
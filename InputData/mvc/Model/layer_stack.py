@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import numpy as np
+
+from InputData.mvc.Model.size import Size
+from InputData.mvc.Model.surface import Surface, SurfaceProperty
+from res.strings import Limits
+
+
+def interpolate_levels(top: np.ndarray, top_z: int, bottom: np.ndarray, bottom_z: int) -> \
+        (np.ndarray, np.ndarray):
+    """ Contours (n_levels, dot_count, 2) on every integer z between two layers """
+    levels = np.arange(top_z + 1, bottom_z)
+    h = np.abs((levels - top_z) / (top_z - bottom_z))
+    return levels, top - h[:, None, None] * (top - bottom)
+
+
+class LayerStack:
+    """ Intermediate layers of a lithology: z (n,) and dots (n, dot_count, 2) """
+    __slots__ = 'size', 'z', 'dots'
+
+    def __init__(self, size: Size, z: np.ndarray, dots: np.ndarray):
+        self.size = size
+        self.z, self.dots = z, dots
+
+    def __len__(self) -> int:
+        return len(self.z)
+
+    def layers(self) -> [StackLayer]:
+        return [StackLayer(self, i) for i in range(len(self))]
+
+
+class StackLayer:
+    """ Layer of a LayerStack, get_surface makes a Surface for the editor """
+    __slots__ = 'stack', 'index'
+    primary = False
+
+    def __init__(self, stack: LayerStack, index: int):
+        self.stack, self.index = stack, index
+
+    @property
+    def z(self) -> int:
+        return int(self.stack.z[self.index])
+
+    @z.setter
+    def z(self, value: int):
+        self.stack.z[self.index] = value
+
+    @property
+    def size(self) -> Size:
+        return self.stack.size
+
+    @property
+    def dots(self) -> np.ndarray:
+        return self.stack.dots[self.index]
+
+    @property
+    def closed_dots(self) -> np.ndarray:
+        dots = self.dots
+        if len(dots) and (dots[0] != dots[-1]).any():
+            return np.concatenate([dots, dots[:1]])
+        return dots
+
+    @property
+    def scaled_dots(self) -> np.ndarray:
+        return self.closed_dots * (self.size.x / Limits.BASE_PLOT_SCALE,
+                                   self.size.y / Limits.BASE_PLOT_SCALE)
+
+    @property
+    def x(self) -> [float]:
+        return self.dots[:, 0].tolist()
+
+    @property
+    def y(self) -> [float]:
+        return self.dots[:, 1].tolist()
+
+    @property
+    def curve(self) -> ([float], [float]):
+        x, y = self.closed_dots.T.tolist()
+        return x, y
+
+    @property
+    def scalable_curve(self) -> ([float], [float]):
+        x, y = self.scaled_dots.T.tolist()
+        return x, y
+
+    def get_copy(self) -> SurfaceProperty:
+        this_copy = SurfaceProperty(self.size, self.z)
+        this_copy.curve, this_copy.primary = self.dots.T, False
+        return this_copy
+
+    def with_dots(self, dots: np.ndarray) -> SurfaceProperty:
+        this_copy = SurfaceProperty(self.size, self.z)
+        this_copy._dots, this_copy.primary = dots, False
+        return this_copy
+
+    def get_surface(self) -> Surface:
+        surface = Surface(self.size, self.z)
+        surface.curve, surface.primary = self.dots.T, False
+        return surface
+
+    def get_as_dict(self) -> dict:
+        return self.get_copy().get_as_dict()
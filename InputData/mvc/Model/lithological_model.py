@@ -1,24 +1,26 @@
-import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-from PyQt5.QtWidgets import QMessageBox
-from matplotlib import pyplot as plt
 
 from InputData.mvc.Model.roof_profile import RoofProfile, RoofPoint
 from InputData.mvc.Model.lithology import Lithology
 from InputData.mvc.Model.size import Size
 from InputData.mvc.Model.split import Split
 from InputData.mvc.Model.surface import get_square_surface
+from res.strings import Limits
+from utils.counter import Generation
 from utils.file import dict_from_json
-from utils.geometry.point_in_polygon import check_polygon_in_polygon
+from utils.fill_report import FillReport, fill_report
+from utils.geometry.polygon_mask import rasterize_layer
 from utils.json_in_out import JsonInOut
+from utils.notification import notify
 from utils.observer import Subject
+from utils.occupancy import Occupancy
+from utils.run_length import short_runs
 from utils.to_1d import to_1d
-from utils.transform_data_to_export import dict_update, transform_data
-
-PointType = (float, float, int)
-
+from utils.transform_data_to_export import IntervalTable
 
 def pop_from_dict(dict_value: dict, name: str):
     dict_value[name] = False
@@ -31,26 +33,13 @@ def pop_from_dict_many(dict_value: dict, names: [str]):
 
 
 def plot_roof(xs: [float], ys: [float], zs: [float]):
+    from matplotlib import pyplot as plt
     plt.figure().add_subplot(111, projection='3d').scatter(xs, ys, zs)
     plt.show()
 
 
-def fit_to_grid(data: {PointType}, x_size: int = 25, y_size: int = 25) -> {PointType}:
-    fit_data = {}
-    for i, j in [(i, j) for i in range(x_size) for j in range(y_size)]:
-        if data.get(f'{i}-{j}') is None:
-            for i1, j1 in [(i - 1, j - 1), (i + 1, j - 1), (i - 1, j + 1), (i + 1, j + 1)]:
-                if data.get(f'{i1}-{i1}') is not None:
-                    fit_data[f'{i}-{j}'] = data[f'{i1}-{i1}']
-                    break
-        else:
-            fit_data[f'{i}-{j}'] = data[f'{i}-{j}']
-
-    return fit_data
-
-
 class LithologicalModel(Subject, JsonInOut):
-    __slots__ = 'size', 'shapes', 'roof_profile', 'data', 'draw_speed', 'splits'
+    __slots__ = 'size', 'shapes', 'roof_profile', 'data', 'draw_speed', 'splits', '__visible'
 
     def __init__(self, data: dict = None):
         super().__init__()
@@ -63,6 +52,8 @@ class LithologicalModel(Subject, JsonInOut):
         self.roof_profile = RoofProfile()
         self.splits: [Split] = [Split(), Split()]
         self.shapes: [Lithology] = list()
+        self.__visible: (Optional[tuple], [Lithology]) = (None, [])
+        Generation.step()
 
         if data:
             self.__load_from_dict(data)
@@ -74,6 +65,7 @@ class LithologicalModel(Subject, JsonInOut):
             figure._observers = self._observers
 
         self.shapes.append(figure)
+        Generation.step()
         self.notify()
         return figure
 
@@ -82,17 +74,35 @@ class LithologicalModel(Subject, JsonInOut):
             self.shapes.pop(index)
         if figure:
             self.shapes.remove(figure)
+        Generation.step()
         self.notify()
 
     def get_shapes(self) -> [Lithology]:
         return self.shapes
 
+    def changed(self):
+        """ For the edits of the lithologies, their parts and the splits made in place """
+        Generation.step()
+
+    @property
+    def generation(self) -> (int, (bool, ...)):
+        """ Generation.value and which lithologies have intermediate layers, those are split too """
+        return Generation.value, tuple(shape.presence_intermediate_layers for shape in self.shapes)
+
     def get_visible_shapes(self) -> [Lithology]:
-        shapes_with_split = []
-        for shape in [i for i in self.shapes if i.visible]:
-            shapes_with_split = shapes_with_split + shape.splitting_shape(self.splits)
-        filtered_lithology = filter(lambda i: i.visible is True, shapes_with_split)
-        return sorted(filtered_lithology, key=lambda i: i.priority).__reversed__()
+        """ Split parts of the visible lithologies by priority, kept until the generation changes.
+        Copies of the kept parts are returned, the callers replace their layers. """
+        cached, shapes = self.__visible
+        if self.generation != cached:
+            shapes_with_split = []
+            for shape in [i for i in self.shapes if i.visible]:
+                shapes_with_split += shape.splitting_shape(self.splits)
+            filtered_lithology = [i for i in shapes_with_split if i.visible is True]
+            shapes = [i.get_copy() for i in
+                      sorted(filtered_lithology, key=lambda i: i.priority)[::-1]]
+            # splitting steps the generation with the layers of the new parts
+            self.__visible = self.generation, shapes
+        return [shape.get_copy() for shape in shapes]
 
     def get_shape_with_part(self) -> [Lithology]:
         layers = []
@@ -163,6 +173,10 @@ class LithologicalModel(Subject, JsonInOut):
         self.size.z_constraints.end = max(
             [i.height for i in self.shapes] + [self.size.z_constraints.end])
 
+    def roof_offset(self, lithology: Lithology) -> np.ndarray:
+        roof = self.roof_profile.get_x_y_offset(base=max(self.size.x, self.size.y))
+        return np.zeros_like(roof) if lithology.filler else roof
+
     @property
     def height(self) -> int:
         if len(self.shapes) > 0:
@@ -177,94 +191,107 @@ class LithologicalModel(Subject, JsonInOut):
         return max(self.shapes, key=lambda i: i.height_with_offset).height_with_offset + max_offset
 
 
+def rasterize_body(layers: [([float], [float], int)], roof: np.ndarray, size_z: int,
+                   height: int) -> np.ndarray:
+    """ Cells of a body in the export range, before the claims of the other bodies """
+    data = np.zeros(roof.shape + (height,), dtype=bool)
+    for x, y, lay_z in layers:
+        xs, ys, zs = rasterize_layer(x, y, lay_z, roof)
+        inside = (0 <= zs) & (zs < size_z)
+        data[xs[inside], ys[inside], zs[inside]] = True
+    return data
+
+
 class ExportMap:
 
-    def __init__(self, lithological_model: LithologicalModel):
+    def __init__(self, lithological_model: LithologicalModel,
+                 min_run_length: int = Limits.MIN_RUN_LENGTH, max_workers: Optional[int] = 1):
         self.lithological_model = lithological_model
-        self.repeat, self.lithological_model.data = {}, {}
+        self.min_run_length = min_run_length
+        self.max_workers = max_workers
+        self.clear()
+
+    def clear(self):
+        size = self.lithological_model.size
+        self.repeat, self.lithological_model.data = Occupancy(size.x, size.y, size.z), {}
+        self.intervals = IntervalTable(size.x, size.y)
+        self.report: Optional[FillReport] = None
 
     def __call__(self, *args, **kwargs) -> dict:
         for shape in self.lithological_model.shapes:
-            shape.calc_intermediate_layers()
+            shape.update_intermediate_layers()
         return self.export()
 
     def export(self) -> dict:
-        self.__init__(self.lithological_model)
-        for lithology in self.lithological_model.get_visible_shapes():
-
-            data = self.calc_polygon_in_draw(lithology)
-            if not lithology.filler:
-                data = self.correction_strong_mixing(data, lithology.size.x, lithology.size.y)
-
-            self.lithological_model.data[f'{lithology.name}|{lithology.sub_name}'] = \
-                dict_update(self.lithological_model.data.get(lithology.name), transform_data(data))
-
-        self.lithological_model.data = {k: v for k, v in self.lithological_model.data.items() if v}
-        column_names = {}
-        for x, y in [(x, y) for x in range(self.lithological_model.size.x)
-                     for y in range(self.lithological_model.size.y)]:
-            column_names[f'{x}-{y}'] = 0
-            for v in self.lithological_model.data.values():
-                try:
-                    column_names[f'{x}-{y}'] += sum([cv['e'] - cv['s'] + 1 for cv in v[x][y]])
-                except:
-                    pass
-
-        ceil_number = sum([v for v in column_names.values()])
-        size = self.lithological_model.size
-        if ceil_number != size.x * size.y * size.z:
-            collumn_error = [(k, v) for k, v in column_names.items() if v != size.z]
-            msg = QMessageBox()
-            msg.setWindowTitle("Error ceil number")
-            msg.setText(
-                f"Ceil number {ceil_number} - target{size.x * size.y * size.z}.\n\n"
-                f"Error in column: {collumn_error}")
-            msg.exec_()
+        self.clear()
+        if self.max_workers == 1:
+            for lithology in self.lithological_model.get_visible_shapes():
+                self.add_body(lithology, self.calc_polygon_in_draw(lithology))
+        else:
+            self.export_parallel()
+
+        self.lithological_model.data = self.intervals.to_dict()
+        self.check_fill()
         return self.lithological_model.data
 
+    def check_fill(self) -> FillReport:
+        """ Every column has to be filled once up to size.z, an error is shown through notify """
+        self.report = fill_report(self.intervals, self.lithological_model.size.z)
+        if not self.report.valid:
+            notify("Error ceil number", self.report.message())
+        return self.report
+
+    def export_parallel(self):
+        shapes = list(self.lithological_model.get_visible_shapes())
+        with ProcessPoolExecutor(self.max_workers) as executor:
+            bodies = [executor.submit(rasterize_body, *self.body_task(s)) for s in shapes]
+            for lithology, body in zip(shapes, bodies):
+                self.add_body(lithology, self.merge_body(body.result()))
+
+    def add_body(self, lithology: Lithology, data: np.ndarray):
+        if not lithology.filler:
+            data = self.correction_strong_mixing(data)
+        self.intervals.add_cube(f'{lithology.name}|{lithology.sub_name}', data)
+
+    def body_task(self, fig: Lithology) -> ([([float], [float], int)], np.ndarray, int, int):
+        size, roof = self.lithological_model.size, self.lithological_model.roof_offset(fig)
+        height = int(fig.height + roof.max() + 1)
+        roof = roof[:fig.size.x, :fig.size.y]
+        layers = [(*lay.scaled_dots.T, lay.z) for lay in fig.layers]
+        return layers, roof, size.z, height
+
+    def merge_body(self, data: np.ndarray) -> np.ndarray:
+        """ Same claims as calc_polygon_in_draw, for a body rasterized without the claim map """
+        top = min(data.shape[2], self.repeat.shape[2])
+        claimed = self.repeat.cube[:data.shape[0], :data.shape[1], :top]
+        data[:, :, :top] &= ~claimed
+        claimed |= data[:, :, :top]
+        return data
+
     def calc_polygon_in_draw(self, fig: Lithology) -> []:
-        size = self.lithological_model.size
-        roof = self.lithological_model.roof_profile.get_x_y_offset(base=max(size.x, size.y))
-        roof = [[0 if fig.filler else j for j in i] for i in roof]
-        x_size, y_size, z_size = size.x, size.y, int(
-            fig.height + max(a for b in roof for a in b) + 1)
-        data = np.zeros([x_size, y_size, z_size], dtype=bool)
+        size, roof = self.lithological_model.size, self.lithological_model.roof_offset(fig)
+        data = np.zeros([size.x, size.y, int(fig.height + roof.max() + 1)], dtype=bool)
+        roof = roof[:fig.size.x, :fig.size.y]
 
         for lay in fig.layers:
-            (x, y), lay_z = lay.scalable_curve, lay.z
-            for x1 in range(fig.size.x):
-                x1_c = math.ceil(x1)
-                xx, rpo_x = [x1_c, x1_c + 1, x1_c, x1_c + 1], roof[x1]
-                for y1 in range(fig.size.y):
-                    y1_c = math.ceil(y1)
-                    z1_offset, yy = int(lay_z + rpo_x[y1]), [y1_c, y1_c, y1_c + 1, y1_c + 1]
-                    if check_polygon_in_polygon(x, y, xx, yy):
-                        rep_name = f'{x1}-{y1}-{z1_offset}'
-                        if self.repeat.get(rep_name) is None and 0 <= z1_offset < fig.size.z:
-                            self.repeat[rep_name] = True
-                            data[x1, y1, z1_offset] = True
+            (x, y), lay_z = lay.scaled_dots.T, lay.z
+            xs, ys, zs = rasterize_layer(x, y, lay_z, roof)
+            claimed = self.repeat.claim(xs, ys, zs)
+            data[xs[claimed], ys[claimed], zs[claimed]] = True
 
         return data
 
-    def correction_strong_mixing(self, data: [], size_x, size_y) -> []:
-        for x1, y1 in [(x1, y1) for x1 in range(size_x) for y1 in range(size_y)]:
-            data_column, convert_val = data[x1][y1], []
-            for i in range(len(data_column)):
-                if data_column[i]:
-                    convert_val.append(i)
-                if not data_column[i]:
-                    if len(convert_val) < 4:
-                        for j in convert_val:
-                            self.repeat[f'{x1}-{y1}-{j}'] = None
-                            data[x1][y1][j] = False
-                    convert_val = []
+    def correction_strong_mixing(self, data: np.ndarray) -> np.ndarray:
+        short = short_runs(data, self.min_run_length)
+        self.repeat.release(*np.nonzero(short))
+        data[short] = False
         return data
 
 
 class ExportRoof(ExportMap):
 
     def __init__(self, data_map: LithologicalModel, initial_depth=2000, step_depth=0.2,
-                 path: str = None):
+                 path: str = None, plot: bool = False):
         super(ExportRoof, self).__init__(data_map)
         self.initial_depth = initial_depth
         self.step_depth = step_depth
@@ -282,9 +309,9 @@ class ExportRoof(ExportMap):
         if path is None:
             path = 'temp_files/test'
         path += '.csv'
-        self.export_to_csv(path)
+        self.export_to_csv(path, plot)
 
-    def export_to_csv(self, path: str):
+    def export_to_csv(self, path: str, plot: bool = False):
         size = self.lithological_model.size
         main_layers = [s for s in self.lithological_model.shapes if s.filler is False]
 
@@ -303,40 +330,38 @@ class ExportRoof(ExportMap):
         shape = Lithology(size)
         shape.parts_property = parts_property
         shape.add_layer(get_square_surface(size, min_z, 24.99))
-        shapes = shape.splitting_shape(self.lithological_model.splits)
+        top = self.top_surface(shape.splitting_shape(self.lithological_model.splits))
 
-        points = {}
-        for shape in shapes:
-            roof = transform_data(self.calc_polygon_in_draw(shape))
-            points.update({f'{k}-{k1}': (k, k1, v1[0]['s'])
-                           for k, v in roof.items() for k1, v1 in v.items()})
-
-        fit_to_grid(points, size.x, size.y)
-        points = sorted(points.values(), key=lambda i: i[0])
-        points = sorted(points, key=lambda i: i[1])
-
-        df = self.data_prepare_for_export(points, max_z - min_z)
+        # rows ordered by j, then by i
+        j, i = np.nonzero(top.T >= 0)
+        df = self.data_prepare_for_export(i, j, top[i, j], max_z - min_z)
         df.to_csv(path, index=False)
-        plot_roof(xs=df['i_index'], ys=df['j_index'], zs=df['seisVal'])
+        if plot:
+            plot_roof(xs=df['i_index'], ys=df['j_index'], zs=df['seisVal'])
+
+    def top_surface(self, shapes: [Lithology]) -> np.ndarray:
+        """ First filled z of every column, -1 if empty. A later shape overrides the column """
+        size = self.lithological_model.size
+        top = np.full([size.x, size.y], -1)
+        for shape in shapes:
+            data = self.calc_polygon_in_draw(shape)
+            filled = data.any(axis=2)
+            top[filled] = data.argmax(axis=2)[filled]
+        return top
 
-    def data_prepare_for_export(self, data: [PointType],
+    def data_prepare_for_export(self, i: np.ndarray, j: np.ndarray, z: np.ndarray,
                                 thickness_of_the_formation: float) -> pd.DataFrame:
-        pf = []
-        template = self.template.copy()
-        for x1, y1, z1 in data:
-            template.update({
-                'cSurface': 'Layer1',
-                'seisVal': self.initial_depth + z1 * self.step_depth,
-                'iSurf': 1,
-                'i_index': x1 + 1,
-                'j_index': y1 + 1,
-            })
-            pf.append(template.copy())
-            template.update({
-                'cSurface': 'Layer2',
-                'seisVal': template['seisVal'] + thickness_of_the_formation * self.step_depth,
-                'iSurf': 2,
-            })
-            pf.append(template.copy())
-
-        return pd.DataFrame(pf, columns=template.keys())
+        """ Layer1 and Layer2 rows of every (i, j, z) point """
+        layer1 = self.initial_depth + np.asarray(z) * self.step_depth
+        layer2 = layer1 + thickness_of_the_formation * self.step_depth
+        count = 2 * len(layer1)
+
+        columns = {k: np.full(count, v) for k, v in self.template.items()}
+        columns.update({
+            'cSurface': np.tile(['Layer1', 'Layer2'], len(layer1)),
+            'seisVal': np.stack([layer1, layer2], axis=1).ravel(),
+            'iSurf': np.tile([1, 2], len(layer1)),
+            'i_index': np.repeat(np.asarray(i) + 1, 2),
+            'j_index': np.repeat(np.asarray(j) + 1, 2),
+        })
+        return pd.DataFrame(columns, columns=list(self.template.keys()))
@@ -1,21 +1,21 @@
 from __future__ import annotations
 
 import random
-from typing import List, Optional
+from copy import copy
+from typing import Callable, List, Optional
 
-from InputData.mvc.Model.line_segment import LineSegment
-from InputData.mvc.Model.point import Point
+import numpy as np
+
+from InputData.mvc.Model.layer_stack import LayerStack, interpolate_levels
 from InputData.mvc.Model.size import Size
 from InputData.mvc.Model.split import Split
-from InputData.mvc.Model.surface import Surface, get_square_surface
+from InputData.mvc.Model.surface import Surface, SurfaceProperty, get_square_surface
 from res.strings import Limits
+from utils.counter import Generation
 from utils.file import dict_from_json
-from utils.geometry.angle_line import intersection_segment_dot
 from utils.geometry.calc_offset import calc_offset
-from utils.geometry.intersection_point_horizontal_plane import intersection_point_horizontal_plane
-from utils.geometry.point_in_polygon import check_point_in_polygon
-from utils.geometry.simplify_line import simplify_line
-from utils.geometry.split_square import rectangle, split_square
+from utils.geometry.simplify_line import simplify_lines
+from utils.geometry.split_square import split_curves, split_rectangle
 from utils.observer import Subject
 from utils.recursive_extraction_of_list import recursive_extraction
 
@@ -73,6 +73,7 @@ class LithologyProperty(Subject):
     @offset.setter
     def offset(self, value):
         self._offset = value
+        Generation.step()
 
     @property
     def filler(self):
@@ -81,6 +82,7 @@ class LithologyProperty(Subject):
     @filler.setter
     def filler(self, value: bool):
         self._filler = value
+        Generation.step()
         if self._filler:
             self.priority = 1
             self.alpha = 0.1
@@ -93,6 +95,7 @@ class LithologyProperty(Subject):
     def alpha(self, value: float):
         if 0 <= value <= 1:
             self._alpha = value
+            Generation.step()
 
     @property
     def color(self) -> (int, int, int):
@@ -103,6 +106,7 @@ class LithologyProperty(Subject):
         r, g, b = value
         if int(r) in range(256) and int(g) in range(256) and int(b) in range(256):
             self._color = [r, g, b]
+            Generation.step()
 
     @property
     def height(self) -> int:
@@ -128,6 +132,7 @@ class LithologyProperty(Subject):
         value = int(value)
         if value in range(101):
             self._priority = value
+            Generation.step()
 
     def get_as_dict(self) -> dict:
         my_dict = {}
@@ -153,12 +158,14 @@ class LithologyProperty(Subject):
                             data_dict[name_property])
                     else:
                         self.__setattr__(name_property, data_dict[name_property])
+        Generation.step()
         self.notify()
 
 
 class Lithology(LithologyProperty):
     def __init__(self, size: Size, path: str = None, load_dict=None) -> None:
         super().__init__(size)
+        self.__intermediate: (Optional[int], [Surface]) = (None, [])
         self.add_layer(Surface(size=self.size, z=0))
 
         if path:
@@ -166,25 +173,19 @@ class Lithology(LithologyProperty):
         if load_dict:
             self.load_from_dict(load_dict)
 
-    def __add_offset_x_y(self, shape: Lithology):
+    def __add_offset_x_y(self, shape: Lithology, layers: [SurfaceProperty] = None):
         p_prop, a_name = self.parts_property, shape.sub_name
         a_offset = p_prop.get(a_name).offset if p_prop.get(a_name) is not None else 0
-        if len(shape.layers):
-            lay = shape.layers[-1]
-
-            lay.x = [x + a_offset * shape.x_offset for x in lay.x]
-            lay.y = [y + a_offset * shape.y_offset for y in lay.y]
-
-    def __prepare_layer_for_split(self, lay_main, a_shape: Lithology, b_shape: Lithology) -> \
-            (Surface, Surface):
-        a_shape.layers.append(lay_main.get_copy())
-        b_shape.layers.append(lay_main.get_copy())
-        a_shape.layers[-1].size = b_shape.layers[-1].size = self.size
-        lay_a, lay_b = a_shape.layers[-1], b_shape.layers[-1]
-        lay_a.clear()
-        lay_b.clear()
+        shift = (a_offset * shape.x_offset, a_offset * shape.y_offset)
+        if shift == (0, 0):
+            return
+        for lay in shape.layers[-1:] if layers is None else layers:
+            lay.curve = (lay.dots + shift).T
 
-        return lay_a, lay_b
+    def __split_layer(self, lay_main: Surface, dots: np.ndarray) -> SurfaceProperty:
+        layer = lay_main.with_dots(dots)
+        layer.size = self.size
+        return layer
 
     def __shapes_set_offsets(self, shapes: [Lithology]):
         for shape in shapes:
@@ -194,29 +195,19 @@ class Lithology(LithologyProperty):
                 for surf in shape.layers:
                     surf.z += shape.offset
 
-    def __split_polygon(self, split: Split, lay_main: Surface, x_off: float, y_off: float) -> (
-            ([float], [float]), ([float], [float]), Point, Point):
-        a_x, a_y, b_x, b_y = split.line.a.x, split.line.a.y, split.line.b.x, split.line.b.y
-
-        level = lay_main.z if split.from_start else max(self.layers,
-                                                        key=lambda i: i.z).z - lay_main.z
-        level -= sorted(self.layers, key=lambda i: i.z)[0].z
+    def __split_levels(self, split: Split) -> Callable[[int], int]:
+        top, bottom = max(lay.z for lay in self.layers), min(lay.z for lay in self.layers)
+        return lambda z: (z if split.from_start else top - z) - bottom
 
+    @staticmethod
+    def __split_polygon(split: Split, level: int, x_off: float, y_off: float) -> (
+            ([float], [float]), ([float], [float]), (float, float), (float, float)):
+        a_x, a_y, b_x, b_y = split.line.a.x, split.line.a.y, split.line.b.x, split.line.b.y
         a_x, a_y = a_x + (x_off * level), a_y + (y_off * level)
         b_x, b_y = b_x + (x_off * level), b_y + (y_off * level)
-        old_split_level = LineSegment(Point(a_x, a_y), Point(b_x, b_y))
 
         scale = Limits.BASE_PLOT_SCALE
-        a_polygon, b_polygon, split_level = split_square(rectangle(scale, scale), old_split_level)
-
-        x1, x2 = old_split_level.a.x, old_split_level.b.x
-        y1, y2 = old_split_level.a.y, old_split_level.b.y
-        a_sum = sum([(a.x - x1) * (y2 - y1) - (a.y - y1) * (x2 - x1) for a in a_polygon.dots])
-        b_sum = sum([(b.x - x1) * (y2 - y1) - (b.y - y1) * (x2 - x1) for b in b_polygon.dots])
-        if a_sum < 0 or b_sum > 0:
-            a_polygon, b_polygon = b_polygon, a_polygon
-
-        return a_polygon.get_x_y(), b_polygon.get_x_y(), split_level.a, split_level.b
+        return split_rectangle(scale, scale, (a_x, a_y), (b_x, b_y))
 
     def add_layer(self, layer: Surface = None) -> Surface:
         return self.insert_layer(len(self.layers), layer)
@@ -227,50 +218,65 @@ class Lithology(LithologyProperty):
 
         if self.parts_property.get(shape.sub_name) is None:
             self.parts_property[shape.sub_name] = shape
-        else:
-            shape.name = self.parts_property[shape.sub_name].name = self.name
-            shape.visible = self.parts_property.get(shape.sub_name).visible
-            shape.offset = int(round(self.parts_property.get(shape.sub_name).offset))
-            # shape.color = self.parts_property.get(shape.sub_name).color
-            shape.alpha = self.alpha
-            shape.priority = self.priority
+        shape.name = self.parts_property[shape.sub_name].name = self.name
+        shape.visible = self.parts_property.get(shape.sub_name).visible
+        shape.offset = int(round(self.parts_property.get(shape.sub_name).offset))
+        # shape.color = self.parts_property.get(shape.sub_name).color
+        shape.alpha = self.alpha
+        shape.priority = self.priority
 
     def calc_intermediate_layers(self):
         self.delete_secondary_surface()
-        this_layers = [lay for lay in self.layers if len(lay.curve[0]) > 0]
+        this_layers = [lay for lay in self.layers if len(lay.dots) > 0]
 
         if not this_layers:
             return
 
-        dot_count = len(min(this_layers, key=lambda layer: len(layer.x)).x)
-        new_layers = [this_layers[0]]
-
-        for i in range(len(this_layers) - 1):
-            top_z = this_layers[i].z
-            bottom_z = this_layers[i + 1].z
+        dot_count = min(len(lay.dots) for lay in this_layers)
+        curves = simplify_lines([lay.closed_dots.T for lay in this_layers], dot_count)
 
-            top_lay_x, top_lay_y = this_layers[i].curve
-            top_lay_x, top_lay_y = simplify_line(top_lay_x, top_lay_y, dot_count)
+        pairs = [interpolate_levels(top, top_lay.z, bottom, bottom_lay.z) for top, top_lay, bottom,
+                 bottom_lay in zip(curves, this_layers, curves[1:], this_layers[1:])]
+        levels = np.concatenate([np.zeros(0, dtype=int)] + [z for z, _ in pairs])
+        dots = np.concatenate([np.zeros([0, dot_count, 2])] + [d for _, d in pairs])
+        stack = LayerStack(self.size, levels, dots)
+        secondary, new_layers = iter(stack.layers()), [this_layers[0]]
 
-            bottom_lay_x, bottom_lay_y = this_layers[i + 1].curve
-            bottom_lay_x, bottom_lay_y = simplify_line(bottom_lay_x, bottom_lay_y, dot_count)
-
-            for loc_z in range(top_z + 1, bottom_z):
-                intermediate_lay = Surface(z=loc_z, size=self.size)
-                intermediate_lay.primary = False
-
-                for dot_n in range(dot_count):
-                    a = [top_lay_x[dot_n], top_lay_y[dot_n], top_z]
-                    b = [bottom_lay_x[dot_n], bottom_lay_y[dot_n], bottom_z]
-                    x, y, _ = intersection_point_horizontal_plane(a, b, loc_z)
-                    intermediate_lay.add_dot(x, y)
-
-                new_layers.append(intermediate_lay)
-
-            new_layers.append(this_layers[i + 1])
+        for lay, (levels, _) in zip(this_layers[1:], pairs):
+            new_layers += [next(secondary) for _ in levels]
+            new_layers.append(lay)
 
         self.presence_intermediate_layers = True
         self.layers = new_layers
+        self.__intermediate = (self.primary_layers_key(), new_layers.copy())
+
+    def primary_layers_key(self) -> int:
+        primary = [lay for lay in self.layers if lay.primary]
+        return hash(tuple((lay.z, lay.dots.tobytes()) for lay in primary))
+
+    def get_copy(self) -> Lithology:
+        """ Shallow copy with its own list of the same layers """
+        this_copy = copy(self)
+        this_copy.layers = self.layers.copy()
+        return this_copy
+
+    def update_intermediate_layers(self):
+        """ calc_intermediate_layers, reused while the primary layers stay the same """
+        key, layers = self.__intermediate
+        primary = [lay for lay in self.layers if lay.primary]
+        if key != self.primary_layers_key() or primary != [lay for lay in layers if lay.primary]:
+            self.calc_intermediate_layers()
+        else:
+            self.presence_intermediate_layers = True
+            self.layers = layers.copy()
+
+    def get_surface(self, index: int) -> Surface:
+        """ Intermediate layer is replaced with a Surface when the editor needs it """
+        layer = self.layers[index]
+        if not isinstance(layer, Surface):
+            layer = self.layers[index] = layer.get_surface()
+            layer.prev_layer, layer.next_layer = self.get_prev_layer, self.get_next_layer
+        return layer
 
     def delete_secondary_surface(self):
         self.presence_intermediate_layers = False
@@ -310,6 +316,7 @@ class Lithology(LithologyProperty):
 
         layer.prev_layer = self.get_prev_layer
         layer.next_layer = self.get_next_layer
+        Generation.step()
         return layer
 
     def load_from_dict(self, data_dict: dict):
@@ -326,6 +333,7 @@ class Lithology(LithologyProperty):
         index = index if index in range(0, self.height + 1) else 0 if index <= 0 else len(
             self.layers) - 1
         self.layers.pop(index)
+        Generation.step()
         # self.notify()
 
     def set_filler(self, value: bool):
@@ -341,7 +349,7 @@ class Lithology(LithologyProperty):
             surf.z = self.size.z
 
     def set_layer_z(self, index, value):
-        self.layers[index].z = value
+        self.get_surface(index).z = value
 
     def sorted_layers(self):
         self.layers = sorted(self.layers, key=lambda lay: lay.z)
@@ -358,40 +366,24 @@ class Lithology(LithologyProperty):
 
         for split in local_splits:
             x_offset, y_offset = calc_offset(split.angle, split.line)
+            levels = self.__split_levels(split)
             copy_split_shapes = self.split_shapes.copy()
             self.split_shapes = []
             for cur_shape in copy_split_shapes:
                 a_shape, b_shape = split_shape_with_start_param(cur_shape, x_offset, y_offset)
-                for lay_main in [lay_main for lay_main in cur_shape.layers if
-                                 len(lay_main.curve[0]) > 1]:
-                    lay_x, lay_y = lay_main.curve
-
-                    ((a_poly_x, a_poly_y), (b_poly_x, b_poly_y), a_split, b_split) = \
-                        self.__split_polygon(split, lay_main, x_offset, y_offset)
-                    lay_a, lay_b = self.__prepare_layer_for_split(lay_main, a_shape, b_shape)
-
-                    d = [lay_x[0], lay_y[0]]
-
-                    for i, j in zip(lay_x, lay_y):
-                        c, d = d, [i, j]
-                        if a_split.x is not None:
-
-                            x1, y1 = intersection_segment_dot(a_split, b_split, Point(c[0], c[1]),
-                                                              Point(d[0], d[1]))
-                            if x1 is not None and y1 is not None:
-                                lay_a.add_dot(x1, y1)
-                                lay_b.add_dot(x1, y1)
-
-                        if check_point_in_polygon(a_poly_x, a_poly_y, i, j):
-                            lay_a.add_dot(i, j)
-                        if check_point_in_polygon(b_poly_x, b_poly_y, i, j):
-                            lay_b.add_dot(i, j)
+                layers = [lay for lay in cur_shape.layers if len(lay.closed_dots) > 1]
+                parts = [self.__split_polygon(split, levels(lay.z), x_offset, y_offset)
+                         for lay in layers]
+                a_dots, b_dots = split_curves([lay.closed_dots for lay in layers], parts)
 
-                    target_len = len([i for i in splits if i.line.a.x is not None]) * 2
+                for lay_main, a, b in zip(layers, a_dots, b_dots):
+                    a_shape.layers.append(self.__split_layer(lay_main, a))
+                    b_shape.layers.append(self.__split_layer(lay_main, b))
 
-                    if len(a_shape.sub_name) == target_len:
-                        self.__add_offset_x_y(a_shape)
-                        self.__add_offset_x_y(b_shape)
+                target_len = len([i for i in splits if i.line.a.x is not None]) * 2
+                if layers and len(a_shape.sub_name) == target_len:
+                    self.__add_offset_x_y(a_shape, a_shape.layers)
+                    self.__add_offset_x_y(b_shape, b_shape.layers)
 
                 self.split_shapes = self.split_shapes + [a_shape, b_shape]
 
@@ -406,7 +398,7 @@ class Lithology(LithologyProperty):
             return copy_split_shapes
 
         valid_shapes_names = [i.sub_name for i in self.split_shapes if
-                              sum([len(lay.x) for lay in i.layers])]
+                              sum([len(lay.dots) for lay in i.layers])]
         self.split_shapes = [i for i in self.split_shapes if i.sub_name in valid_shapes_names]
         self.parts_property = {k: v for k, v in self.parts_property.items() if
                                k in valid_shapes_names}
@@ -1,8 +1,10 @@
+from typing import Optional
+
 import numpy as np
-from scipy.interpolate import griddata
 
 from utils.json_in_out import JsonInOut
 from utils.geometry.nearest_dot import nearest_dot_index
+from utils.roof_interpolation import interpolate_grid
 from res.strings import Limits
 
 
@@ -24,20 +26,23 @@ class RoofPoint(JsonInOut):
 
 
 class RoofProfile(JsonInOut):
-    __slots__ = 'points', 'interpolate_method', 'values_corner_points'
+    __slots__ = 'points', 'interpolate_method', 'values_corner_points', '__grid'
 
     def __init__(self):
         self.interpolate_method = 'cubic'
         self.points: [RoofPoint] = list()
         self.values_corner_points = {'ll': 0, 'lr': 0, 'ul': 0, 'ur': 0}
+        self.__grid: (Optional[tuple], Optional[np.ndarray]) = (None, None)
 
     def add(self, x: float, y: float, z: float):
         self.points.append(RoofPoint(x, y, z))
+        self.__grid = (None, None)
 
     def pop(self, x, y):
         index = nearest_dot_index([p.x for p in self.points], [p.y for p in self.points], x, y)
         if index in range(len(self.points)):
             self.points.pop(index)
+            self.__grid = (None, None)
 
     def load_from_dict(self, load_dict: dict):
         super(RoofProfile, self).load_from_dict(load_dict)
@@ -48,11 +53,23 @@ class RoofProfile(JsonInOut):
     def get_x_y(self) -> ([float], [float]):
         return [p.x for p in self.points], [p.y for p in self.points]
 
-    def get_x_y_offset(self, base: float) -> [[float]]:
+    def grid_key(self, base: float) -> tuple:
+        """ Everything the offset grid is interpolated from, RoofPoint.change included """
+        return base, self.interpolate_method, tuple(self.values_corner_points.values()), \
+            tuple((p.x, p.y, p.z) for p in self.points)
+
+    def get_x_y_offset(self, base: float) -> np.ndarray:
+        """ Offset on the base * base grid, read-only and shared until the profile changes """
+        key = self.grid_key(base)
+        if self.__grid[0] == key:
+            return self.__grid[1]
+
         scale = Limits.BASE_PLOT_SCALE
         points = np.array([[0, 0], [0, base], [base, 0], [base, base]] +
                           [[p.x / scale * base, p.y / scale * base] for p in self.points])
         ll, lr, ul, ur = self.values_corner_points.values()
         val = np.array([ll, lr, ul, ur] + [p.z for p in self.points])
-        grid_x, grid_y = np.mgrid[0:base:1, 0:base:1]
-        return griddata(points, val, (grid_x, grid_y), method=self.interpolate_method)
+        grid = interpolate_grid(points, val, base, self.interpolate_method)
+        grid.setflags(write=False)
+        self.__grid = key, grid
+        return grid
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from InputData.mvc.Model.line_segment import LineSegment
 from InputData.mvc.Model.point import Point
+from utils.counter import Generation
 from utils.json_in_out import JsonInOut
 
 
@@ -31,12 +32,14 @@ class Split(JsonInOut):
     @line.setter
     def line(self, value: LineSegment):
         self._line = value
+        Generation.step()
 
     def load_from_dict(self, load_dict: dict):
         super(Split, self).load_from_dict(load_dict)
         if load_dict.get('_line') is not None:
             self._line = LineSegment(Point(), Point())
             self.line.load_from_dict(load_dict['_line'])
+        Generation.step()
 
     def scale_split(self, scale) -> Split:
         scale_split = Split(load_dict=self.get_as_dict())
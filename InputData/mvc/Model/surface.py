@@ -1,62 +1,105 @@
 from __future__ import annotations
 
+from collections import deque
 from copy import deepcopy
-from typing import Callable, Optional, List
+from typing import Any, Callable, Deque, Optional, List
+
+import numpy as np
 
 from InputData.mvc.Model.line_segment import LineSegment
 from InputData.mvc.Model.point import Point
 from InputData.mvc.Model.size import Size
+from utils.counter import Generation
 from utils.recursive_extraction_of_list import recursive_extraction
 from res.strings import Limits
 
 
+def op_size(op: (str, Optional[int], Any, Any)) -> int:
+    """ Approximate bytes of a history operation """
+    return 64 + sum(getattr(state, 'nbytes', 64) for state in op[2:] if state is not None)
+
+
 class SurfacePropertyMemento:
-    __slots__ = ['target', 'history', 'current_version']
+    """ Undo history of operation deltas (insert, pop, move, dots, split).
+    Operations between begin and end are one entry, consecutive moves of a dot are merged. """
+    __slots__ = ['target', 'undo', 'redo', 'budget', 'used', 'gesture']
 
-    def __init__(self, obj: SurfaceProperty):
+    def __init__(self, obj: SurfaceProperty, budget: int = Limits.UNDO_MEMORY):
         self.target = obj
-        self.history: [SurfaceProperty] = list()
-        self.add()
-        self.current_version = -1
+        self.undo: Deque[([tuple], int)] = deque()
+        self.redo: [([tuple], int)] = []
+        self.budget, self.used = budget, 0
+        self.gesture: Optional[[tuple]] = None
+
+    def begin(self):
+        self.end()
+        self.gesture = []
+
+    def end(self):
+        gesture, self.gesture = self.gesture, None
+        if gesture:
+            self.push(gesture)
+
+    def record(self, kind: str, index: Optional[int], before: Any, after: Any):
+        op = (kind, index, before, after)
+        if self.gesture is None:
+            self.push([op])
+            return
+        last = self.gesture[-1] if self.gesture else None
+        if kind == 'move' and last and last[0] == 'move' and last[1] == index:
+            op = (kind, index, last[2], after)
+            self.gesture.pop()
+        self.gesture.append(op)
+
+    def push(self, ops: [tuple]):
+        size = sum(op_size(op) for op in ops)
+        self.undo.append((ops, size))
+        self.redo.clear()
+        self.used += size
+        while self.used > self.budget and len(self.undo) > 1:
+            self.used -= self.undo.popleft()[1]
+
+    def apply(self, op: tuple, forward: bool):
+        kind, index, before, after = op
+        state, target = after if forward else before, self.target
+        if kind == 'move':
+            SurfaceProperty.set_dot(target, index, *state)
+        elif kind in ('insert', 'pop'):
+            if state is None:
+                SurfaceProperty.pop_dot(target, index)
+            else:
+                SurfaceProperty.insert_dot(target, index, *state)
+        elif kind == 'dots':
+            target.curve = state.T
+        elif kind == 'split':
+            target.splits, target.primary = deepcopy(state)
+            Generation.step()
 
     def get_prev(self):
-        self.current_version = self.current_version - 1 if self.current_version > 0 else 0
-        try:
-            surf = self.history[self.current_version]
-        except IndexError:
-            self.current_version = 0
-            surf = self.history[self.current_version]
-
-        self.target.set_from_copy(surf)
-
-    def add(self):
-        sum_size = 0
-        for s in self.history:
-            sum_size += s.__sizeof__()
-
-        if len(self.history) > 100:
-            self.history.pop(0)
-        self.current_version = len(self.history) - 1
-        self.history.append(self.target.get_copy())
+        self.end()
+        if self.undo:
+            ops, size = self.undo.pop()
+            for op in reversed(ops):
+                self.apply(op, False)
+            self.redo.append((ops, size))
+            self.used -= size
 
     def get_next(self):
-        self.current_version += 1
-        try:
-            surf = self.history[self.current_version]
-        except IndexError:
-            self.current_version = len(self.history) - 1
-            surf = self.history[self.current_version]
-        self.target.set_from_copy(surf)
-
-
-def get_border_value(value: [Optional[float]], border: ()) -> Optional[float]:
-    v = [i for i in value if i is not None]
-    return border(v) if v else None
+        self.end()
+        if self.redo:
+            ops, size = self.redo.pop()
+            for op in ops:
+                self.apply(op, True)
+            self.undo.append((ops, size))
+            self.used += size
 
 
 class SurfaceProperty:  # z - высота слоя
-    __slots__ = 'pre_x', 'pre_y', 'start_x', 'start_y', 'x', 'y', '_z', \
-                'primary', 'size', 'splits', 'current_split'
+    """ Contour dots in an (n, 2) float64 buffer, the closed and scaled views are cached """
+    __slots__ = 'pre_x', 'pre_y', 'start_x', 'start_y', '_dots', '_z', \
+                'primary', 'size', 'splits', 'current_split', '_closed', '_scaled'
+    fields = 'pre_x', 'pre_y', 'start_x', 'start_y', 'x', 'y', '_z', \
+             'primary', 'size', 'splits', 'current_split'
 
     def __init__(self, size: Size = None, z: int = -1):
         self.pre_x: Optional[float] = None
@@ -67,8 +110,9 @@ class SurfaceProperty:  # z - высота слоя
         self.current_split: int = 0
         self.splits: List[LineSegment] = []  # split = [start, end]
 
-        self.x: [float] = list()
-        self.y: [float] = list()
+        self._dots = np.zeros((0, 2))
+        self._closed: Optional[np.ndarray] = None
+        self._scaled: Optional[((float, float), np.ndarray)] = None
 
         self._z = z
         self.size = size
@@ -84,33 +128,86 @@ class SurfaceProperty:  # z - высота слоя
             self._z = value
         elif value > Limits.MAX_HEIGHT:
             self._z = Limits.MAX_HEIGHT
+        Generation.step()
+
+    def changed(self):
+        self._closed = self._scaled = None
+        Generation.step()
+
+    @property
+    def dots(self) -> np.ndarray:
+        return self._dots
+
+    @property
+    def x(self) -> [float]:
+        return self._dots[:, 0].tolist()
+
+    @x.setter
+    def x(self, value: [float]):
+        self.__set_column(0, value)
+
+    @property
+    def y(self) -> [float]:
+        return self._dots[:, 1].tolist()
+
+    @y.setter
+    def y(self, value: [float]):
+        self.__set_column(1, value)
+
+    def __set_column(self, column: int, value: [float]):
+        """ The other column is kept on the common length, set it next if the length changed """
+        value = np.asarray(value, dtype=float).reshape(-1)
+        if len(value) != len(self._dots):
+            dots, common = np.full((len(value), 2), np.nan), min(len(value), len(self._dots))
+            dots[:common] = self._dots[:common]
+            self._dots = dots
+        self._dots[:, column] = value
+        self.changed()
+
+    @property
+    def closed_dots(self) -> np.ndarray:
+        if self._closed is None:
+            dots = self._dots
+            if len(dots) and (dots[0] != dots[-1]).any():
+                dots = np.concatenate([dots, dots[:1]])
+            self._closed = dots
+        return self._closed
+
+    @property
+    def scaled_dots(self) -> np.ndarray:
+        """ closed_dots in cells of the size grid """
+        if not self.size:
+            return self.closed_dots
+        scale = (self.size.x / Limits.BASE_PLOT_SCALE, self.size.y / Limits.BASE_PLOT_SCALE)
+        if self._scaled is None or self._scaled[0] != scale:
+            self._scaled = scale, self.closed_dots * scale
+        return self._scaled[1]
 
     @property
     def curve(self) -> ([float], [float]):
-        if self.x and self.y:
-            if self.x[0] != self.x[-1] or self.y[0] != self.y[-1]:
-                return self.x + [self.x[0]], self.y + [self.y[0]]
-        return self.x, self.y
+        x, y = self.closed_dots.T.tolist()
+        return x, y
 
     @curve.setter
     def curve(self, value: ([float], [float])):
-        self.x, self.y = value
+        x, y = value
+        common = min(len(x), len(y))
+        self._dots = np.column_stack([np.asarray(x[:common], dtype=float),
+                                      np.asarray(y[:common], dtype=float)]).reshape(-1, 2)
+        self.changed()
 
     @property
     def scalable_curve(self) -> ([float], [float]):
-        x, y = self.curve
-        if self.size:
-            x = [i * (self.size.x / Limits.BASE_PLOT_SCALE) for i in x]
-            y = [i * (self.size.y / Limits.BASE_PLOT_SCALE) for i in y]
+        x, y = self.scaled_dots.T.tolist()
         return x, y
 
     def get_min_x_and_y(self):
-        x, y = self.scalable_curve
-        return get_border_value(x, min), get_border_value(y, min)
+        dots = self.scaled_dots
+        return (None, None) if not len(dots) else tuple(dots.min(axis=0).tolist())
 
     def get_max_x_and_y(self):
-        x, y = self.scalable_curve
-        return get_border_value(x, max), get_border_value(y, max)
+        dots = self.scaled_dots
+        return (None, None) if not len(dots) else tuple(dots.max(axis=0).tolist())
 
     @property
     def scalable_split(self) -> [LineSegment]:
@@ -127,9 +224,17 @@ class SurfaceProperty:  # z - высота слоя
         self.__copying(self, this_copy)
         return this_copy
 
+    def with_dots(self, dots: np.ndarray) -> SurfaceProperty:
+        """ get_copy with other dots, splits are shared instead of copied """
+        this_copy = SurfaceProperty(self.size, self._z)
+        for slot in ('pre_x', 'pre_y', 'start_x', 'start_y', 'primary', 'splits', 'current_split'):
+            setattr(this_copy, slot, getattr(self, slot))
+        this_copy._dots = dots
+        return this_copy
+
     @staticmethod
     def __copying(from_property: SurfaceProperty, to_property: SurfaceProperty):
-        for slot in SurfaceProperty.__slots__:
+        for slot in SurfaceProperty.fields:
             attribute_name = slot.replace('__', '')
             if hasattr(from_property.__getattribute__(attribute_name), "copy"):
                 copy_attribute = deepcopy(from_property.__getattribute__(attribute_name))
@@ -137,6 +242,7 @@ class SurfaceProperty:  # z - высота слоя
             else:
                 attribute = from_property.__getattribute__(attribute_name)
                 to_property.__setattr__(attribute_name, attribute)
+        to_property.changed()
 
     def set_from_copy(self, copy: SurfaceProperty):
         self.__copying(copy, self)
@@ -144,15 +250,13 @@ class SurfaceProperty:  # z - высота слоя
     def get_as_dict(self) -> dict:
         my_dict = {}
         this_class = SurfaceProperty
-        for slot in this_class.__slots__:
+        for slot in this_class.fields:
             my_dict[slot] = recursive_extraction(getattr(self, slot))
         return my_dict
 
     def load_from_dict(self, load_dict: dict):
         for name_property in load_dict:
-            if name_property.__contains__('x'):
-                self.x = load_dict[name_property]
-            elif name_property == 'size':
+            if name_property in ('x', 'y', 'size'):
                 pass
             elif name_property == 'splits':
                 self.splits = []
@@ -162,10 +266,24 @@ class SurfaceProperty:  # z - высота слоя
             else:
                 if hasattr(self, name_property):
                     self.__setattr__(name_property, load_dict[name_property])
+        if 'x' in load_dict or 'y' in load_dict:
+            self.curve = load_dict.get('x', self.x), load_dict.get('y', self.y)
 
     def add_dot(self, x1: float, y1: float):
-        self.x.append(x1)
-        self.y.append(y1)
+        self.insert_dot(len(self._dots), x1, y1)
+
+    def insert_dot(self, index: int, x1: float, y1: float):
+        index = slice(index, index).indices(len(self._dots))[0]
+        self._dots = np.insert(self._dots, index, (x1, y1), axis=0)
+        self.changed()
+
+    def pop_dot(self, index: int):
+        self._dots = np.delete(self._dots, index, axis=0)
+        self.changed()
+
+    def set_dot(self, index: int, x1: float, y1: float):
+        self._dots[index] = x1, y1
+        self.changed()
 
     def change_dot_split(self, dot_x: float, dot_y: float, start_line: bool = True):
         while len(self.splits) <= self.current_split:
@@ -178,9 +296,11 @@ class SurfaceProperty:  # z - высота слоя
         if self.splits[self.current_split].a == self.splits[self.current_split].b:
             self.splits[self.current_split].a.set(None, None)
             self.splits[self.current_split].b.set(None, None)
+        Generation.step()
 
     def clear(self):
-        self.x, self.y = list(), list()
+        self._dots = np.zeros((0, 2))
+        self.changed()
 
 
 class Surface(SurfaceProperty):
@@ -212,24 +332,30 @@ class Surface(SurfaceProperty):
         self.__next_layer = method
 
     def dot_value_change(self, index, x, y) -> None:
-        if self.x and self.y:
-            if 0 <= index <= len(self.x):
-                self.x[index], self.y[index] = x, y
-                self.memento.add()
+        if len(self.dots):
+            if 0 <= index <= len(self.dots):
+                before = self.dots[index].copy()
+                self.set_dot(index, x, y)
+                self.memento.record('move', index, before, self.dots[index].copy())
 
     def insert_dot(self, index: int, x1: float, y1: float):
         if type(index) is int:
-            self.x.insert(index, x1)
-            self.y.insert(index, y1)
-            self.memento.add()
+            index = slice(index, index).indices(len(self.dots))[0]
+            super(Surface, self).insert_dot(index, x1, y1)
+            self.memento.record('insert', index, None, self.dots[index].copy())
         else:
             print('type error: index is ', type(index), ' = ', index)
 
     def pop_dot(self, index: int):
-        if index in range(0, len(self.x) + 1):
-            self.x.pop(index)
-            self.y.pop(index)
-            self.memento.add()
+        if index in range(0, len(self.dots) + 1):
+            before = self.dots[index].copy()
+            super(Surface, self).pop_dot(index)
+            self.memento.record('pop', index, before, None)
+
+    def set_curve(self, x: [float], y: [float]):
+        before = self.dots
+        self.curve = x, y
+        self.memento.record('dots', None, before, self.dots.copy())
 
     def set_pre_dot(self, x1: float, y1: float):
         self.pre_x, self.pre_y = x1, y1
@@ -240,16 +366,18 @@ class Surface(SurfaceProperty):
         self.set_pre_dot(x1, y1)
 
     def add_dot(self, x1: float, y1: float):
-        self.insert_dot(len(self.x), x1, y1)
+        self.insert_dot(len(self.dots), x1, y1)
 
     def change_dot_split(self, dot_x: float, dot_y: float, start_line: bool = True):
-        self.memento.add()
+        before = deepcopy((self.splits, self.primary))
         self.primary = True
         super(Surface, self).change_dot_split(dot_x, dot_y, start_line)
+        self.memento.record('split', None, before, deepcopy((self.splits, self.primary)))
 
     def clear(self):
-        self.memento.add()
+        before = self.dots
         super(Surface, self).clear()
+        self.memento.record('dots', None, before, self.dots.copy())
 
 
 def get_square_surface(size: Size, z: int, s: float = 24.99) -> Surface:
@@ -26,4 +26,5 @@ class RoofExportDialog(QDialog):
 
         initial_depth = self.initialDepthSpinBox.value()
         step_depth = self.stepDepthDoubleSpinBox.value()
-        ExportRoof(self.data_map, path=path, initial_depth=initial_depth, step_depth=step_depth)
+        ExportRoof(self.data_map, path=path, initial_depth=initial_depth, step_depth=step_depth,
+                   plot=True)
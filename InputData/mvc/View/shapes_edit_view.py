@@ -259,6 +259,7 @@ class ShapeEditWindow(QMainWindow):
     def change_all_layers_show(self, check):
         for lay in self.lithological_model.get_shapes():
             lay.visible = True if check else False
+        self.lithological_model.changed()
         self.update_all()
 
     def accept_view(self):
@@ -267,6 +268,7 @@ class ShapeEditWindow(QMainWindow):
             if type(check_box) is QCheckBox:
                 check_box.property('figure').visible = True if check_box.checkState() else False
 
+        self.lithological_model.changed()
         self.update_all()
 
     def edit_layer(self):
@@ -18,6 +18,7 @@ class SplitEditWindow(QMainWindow):
         self.setWindowTitle(TitleName.SplitEditWindow)
         self.setWindowIcon(QIcon(main_icon()))
 
+        self.lithological_model = lithological_model
         self.splits = lithological_model.splits
         self.surface_editor = EditorSplitController(lithological_model,
                                                     parent=self.draw_polygon_frame)
@@ -30,7 +31,7 @@ class SplitEditWindow(QMainWindow):
         return int(self.splitNumberComboBox.currentText()) - 1
 
     def button_connect(self):
-        split: () = lambda k, v: self.splits[self.current_split_number()].__setattr__(k, v)
+        split: () = lambda k, v: self.set_split(k, v)
 
         self.splitNumberComboBox.activated.connect(self.change_current_split)
         self.angleSpinBox.valueChanged.connect(lambda: split('angle', self.angleSpinBox.value()))
@@ -39,6 +40,10 @@ class SplitEditWindow(QMainWindow):
         self.depthEndRadioButton.clicked.connect(partial(split, 'from_start', False))
         self.saveButton.clicked.connect(self.save)
 
+    def set_split(self, name: str, value):
+        self.splits[self.current_split_number()].__setattr__(name, value)
+        self.lithological_model.changed()
+
     def update_info(self):
         split = self.splits[self.current_split_number()]
 
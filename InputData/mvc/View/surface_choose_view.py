@@ -85,7 +85,8 @@ class ViewingLayersWindow(QMainWindow):
         for i in range(len(surfaces)):
             if surfaces[i].primary is True or surfaces[i].primary is show_sub:
                 frame = self.add_frame_to_layout(i)
-                EditorSurfaceControllerTight(frame, tight=True, surf=surfaces[i],
+                surface = self.surface_editor.lithology.get_surface(i)
+                EditorSurfaceControllerTight(frame, tight=True, surf=surface,
                                              preview_click_handler=lambda j=i: self.change_layer(j))
 
         self.resize(self.size + 20, self.height())
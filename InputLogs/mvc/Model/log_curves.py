@@ -2,18 +2,24 @@ from __future__ import annotations
 
 import random
 import re
+from functools import partial
 from itertools import groupby
 from typing import Optional, Callable
 
 import numpy as np
 from scipy.interpolate import interp1d
+from scipy.signal import lfilter
 
 from res.strings import special_logs_name
-from utils.ceil import ceil
+from utils.ceil import MTR
 from utils.gisaug.augmentations import DropRandomPoints, Stretch
 from utils.json_in_out import JsonInOut
 
 
+# depths of the trend lookup table
+TREND_GRID = np.linspace(0, 1, 1001)
+
+
 def stretch_curve(len_x: int, x: [float]) -> [float]:
     curve = DropRandomPoints(0.95)(np.array(x))
     return Stretch.stretch_curve_by_count(curve, len_x)
@@ -21,7 +27,7 @@ def stretch_curve(len_x: int, x: [float]) -> [float]:
 
 class Log(JsonInOut):
     __slots__ = '_min', '_max', 'name', 'main', '_x', '_trend', 'f_trend', \
-                'dispersion', 'text_expression', 'data_map'
+                'dispersion', 'text_expression', 'data_map', '__trend_function', '__trend_table'
 
     def __init__(self, data_map, data_dict: dict = None, **kwargs):
         self.data_map = data_map
@@ -40,6 +46,14 @@ class Log(JsonInOut):
         for k, v in kwargs.items():
             if hasattr(self, k):
                 setattr(self, k, v)
+        self.__reset_trend()
+
+    def __reset_trend(self):
+        self.__trend_function, self.__trend_table = None, None
+
+    def load_from_dict(self, load_dict: dict):
+        super(Log, self).load_from_dict(load_dict)
+        self.__reset_trend()
 
     @property
     def facia(self) -> str:
@@ -48,25 +62,37 @@ class Log(JsonInOut):
 
     @property
     def trend(self) -> [float]:
-        f_trend = self.f_trend_init()
-        return [(ceil(f_trend(i)), i) for i in np.arange(0, 1, 0.001)]
+        self.f_trend_init()
+        return list(zip(np.clip(self.__trend_table[:-1], -MTR, MTR).tolist(),
+                        TREND_GRID[:-1].tolist()))
 
     @property
     def trend_point(self) -> ([float], [float]):
         return [float(i) for i in self._trend.values()], [float(i) for i in self._trend.keys()]
 
-    def f_trend_init(self):
-        trend_data = [(float(x1), float(y1)) for y1, x1 in self._trend.items()]
-        if len(trend_data) > 2:
-            x, y = [y for _, y in trend_data], [x for x, _ in trend_data]
-            return interp1d(x, y, kind='quadratic')
-        else:
-            return lambda i: 0
+    @property
+    def trend_function(self) -> Callable:
+        """ Quadratic spline of the trend points, fitted once until they change """
+        if self.__trend_function is None:
+            trend_data = [(float(x1), float(y1)) for y1, x1 in self._trend.items()]
+            if len(trend_data) > 2:
+                x, y = [y for _, y in trend_data], [x for x, _ in trend_data]
+                self.__trend_function = interp1d(x, y, kind='quadratic')
+            else:
+                self.__trend_function = lambda i: np.zeros_like(i, dtype=float)
+        return self.__trend_function
+
+    def f_trend_init(self) -> Callable:
+        """ trend_function by np.interp on its table over TREND_GRID """
+        if self.__trend_table is None:
+            self.__trend_table = np.asarray(self.trend_function(TREND_GRID), dtype=float)
+        return partial(np.interp, xp=TREND_GRID, fp=self.__trend_table)
 
     def add_trend_point(self, point: (float, float)):
         x1, y1 = point
         y1 = 1 if y1 > 0.95 else 0 if y1 < 0.05 else y1
         self._trend[f'{y1}'] = x1
+        self.__reset_trend()
 
     def del_trend_point(self, point: (float, float)):
         if len(self._trend) < 3:
@@ -77,6 +103,7 @@ class Log(JsonInOut):
         nearest = [(y1, abs(y - float(y1))) for y1 in keys]
 
         self._trend.pop(min(nearest, key=lambda i: i[1])[0])
+        self.__reset_trend()
 
     def get_text(self) -> str:
         min_max = (f"min = {self.min}, max = {self.max}" if self.max else self.text_expression)
@@ -131,8 +158,8 @@ class Log(JsonInOut):
         else:
             return [0 for _ in range(len_x)]
 
-    def trend_x(self, len_x: int):
-        x = trend(self.min, self.max, self.dispersion, len_x, self.f_trend_init())
+    def trend_x(self, len_x: int, rng: Optional[np.random.Generator] = None):
+        x = trend(self.min, self.max, self.dispersion, len_x, self.f_trend_init(), rng)
         return x
 
     def get_as_dict(self) -> dict:
@@ -141,18 +168,33 @@ class Log(JsonInOut):
         return data
 
 
-def trend(min_x: int, max_x: int, dispersion: float, len_x: int, f_trend: ()) -> [float]:
+def trend_curves(min_x: float, max_x: float, dispersion: float, len_x: int, f_trend: (),
+                 count: int = 1, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """ count random walks of len_x samples between min_x and max_x, shifted by the trend and
+    reflected back into [min_x, max_x], as a (count, len_x) array """
     a, b, avg, des = min_x, max_x, abs(max_x - min_x) / 2, dispersion
+    # seeded from np.random, np.random.seed keeps the curves repeatable
+    rng = np.random.default_rng(np.random.randint(2 ** 31)) if rng is None else rng
+
+    # y[k + 1] = uniform(a + (y[k] - a) * des, b - (b - y[k]) * des)
+    #          = a + (y[k] - a) * des + u[k] * (b - a) * (1 - des)
+    steps = rng.uniform(size=[count, max(len_x - 1, 0)]) * (b - a) * (1 - des)
+    start = np.full([count, 1], (b - a) / 2)
+    walk, _ = lfilter([1], [1, -des], steps, axis=1, zi=start * des)
+    y = a + np.concatenate([start, walk], axis=1)[:, :len_x]
+
+    offset = np.broadcast_to(f_trend(np.arange(len_x) / max(len_x, 1)), [len_x])
+    y = y + avg * np.clip(offset, -MTR, MTR)
 
-    f_rand: () = lambda v: np.random.uniform(a + (v - a) * des, b - (b - v) * des)
-    f_offset: () = lambda i, v: v + avg * ceil(f_trend(i))
-    lim: () = lambda v: v if a <= v <= b else lim(a + a - v) if a > v else lim(b + b - v)
+    if b <= a:
+        return np.full_like(y, a)
+    folded = a + (b - a) - np.abs(np.mod(y - a, 2 * (b - a)) - (b - a))
+    return np.where((a <= y) & (y <= b), y, folded)
 
-    y, len_y = [(min_x + max_x) / 2], len_x
-    for _ in range(len_y - 1):
-        y.append(f_rand(y[-1]))
 
-    return [lim(f_offset(i / len_y, y1)) for i, y1 in zip(range(len_y), y)]
+def trend(min_x: int, max_x: int, dispersion: float, len_x: int, f_trend: (),
+          rng: Optional[np.random.Generator] = None) -> [float]:
+    return trend_curves(min_x, max_x, dispersion, len_x, f_trend, rng=rng)[0].tolist()
 
 
 def expression_array_parser(expression: str, logs_name: [str]) -> Optional[Callable]:
@@ -192,8 +234,7 @@ class ExpressionLog:
         x_r = list(range(500))
         special_logs = {s_l: Log(data_map, {'name': s_l, 'x': x_r}) for s_l in special_logs_name}
 
-        sub_logs: () = lambda name: ([v for v in data_map.all_logs if v.name.split('.')[0] == name]
-                                     if name not in special_logs_name
+        sub_logs: () = lambda name: (data_map.sub_logs(name) if name not in special_logs_name
                                      else [special_logs[name]])
 
         self.logs = {name: random.choice(sub_logs(name)).x for name in log_names}
@@ -1,11 +1,13 @@
 from functools import partial
-from random import random
+from threading import Thread
+from typing import Callable
 
+import numpy as np
 import pandas as pd
 
-from InputLogs.mvc.Model.log_curves import Log, sort_expression_logs, expression_parser
+from InputLogs.mvc.Model.log_curves import Log, sort_expression_logs, expression_parser, \
+    get_variable_expression
 from InputLogs.mvc.Model.map_property import CoreSample, cut_along, MapProperty
-from utils.a_thread import AThread
 from utils.log.log_file import print_log
 from utils.time_work import MyTimer
 
@@ -25,9 +27,8 @@ class ExportLogs:
             print_log('please update data')
             return
 
-        export_thread = AThread()
-        export_thread.finished.connect(lambda: print_log('Finish export Excel'))
-        export_thread.callback = partial(export_method, path)
+        export_thread = Thread(target=partial(run_and_log, partial(export_method, path),
+                                              'Finish export Excel'))
         export_thread.start()
         self.export_threads.append(export_thread)
 
@@ -55,10 +56,8 @@ class ExportLogs:
         self.data_map.export_data = None
         data_map = self.data_map.map_copy()
 
-        r: () = lambda i: round(i, 5) if i is float else i
-
-        coors, data = [(x1, y1) for x1 in range(data_map.max_x + 1) for y1 in
-                       range(data_map.max_y + 1)], {}
+        coors, cells = [(x1, y1) for x1 in range(data_map.max_x + 1) for y1 in
+                        range(data_map.max_y + 1)], []
 
         for log_name in data_map.main_logs_name_non_expression():
             data_map.change_log_select(log_name)
@@ -67,14 +66,10 @@ class ExportLogs:
                 column = data_map.get_column_curve(x, y)
                 MyTimer.check_finish('curve')
                 for x1, lithology, y1 in (column.intervals if column else []):
-                    for i in range(len(x1)):
-                        ceil_name = f'{x}-{y}-{y1[i]}'
-                        if not data.get(ceil_name):
-                            data[ceil_name] = {'i': x + 1, 'j': y + 1,
-                                               'index': y1[i], 'Lithology': lithology}
-                        data[ceil_name][log_name] = r(x1[i])
+                    cells.append((log_name, x, y, lithology, x1, y1))
 
         format_depth: () = lambda ind: ind * self.data_map.step_depth + self.data_map.initial_depth
+        data = export_table(cells)
         data = add_height_above_fwl(data, data_map.owc)
         data = index_to_depth(data, format_depth)
         data = add_log_expression_in_export(data, data_map.attach_logs)
@@ -85,107 +80,133 @@ class ExportLogs:
         self.data_map.export_data = data
 
 
-def index_to_depth(data: {}, depth: ()) -> {}:
-    for values in data.values():
-        values['old_index'] = values['index']
-        values['index'] = depth(values['index'])
+def run_and_log(callback: callable, message: str):
+    callback()
+    print_log(message)
+
+
+def export_table(cells: [(str, int, int, str, [float], [int])]) -> pd.DataFrame:
+    """ Curves (log_name, x, y, lithology, values, indexes) to one row per (i, j, index) in
+    order of appearance and one column per log, NaN where the cell has no value of the log """
+    counts = [len(values) for _, _, _, _, values, _ in cells]
+    rows = pd.DataFrame({
+        'i': np.repeat(np.array([x + 1 for _, x, _, _, _, _ in cells], dtype=int), counts),
+        'j': np.repeat(np.array([y + 1 for _, _, y, _, _, _ in cells], dtype=int), counts),
+        'index': np.concatenate([np.asarray(i, dtype=int) for *_, i in cells] or
+                                [np.zeros(0, dtype=int)]),
+        'Lithology': np.repeat(np.array([lithology for _, _, _, lithology, _, _ in cells],
+                                        dtype=object), counts),
+    })
+    row = rows.groupby(['i', 'j', 'index'], sort=False).ngroup().to_numpy()
+    data = rows.iloc[np.unique(row, return_index=True)[1]].reset_index(drop=True)
+
+    logs = np.repeat([log_name for log_name, *_ in cells], counts)
+    for log_name in dict.fromkeys(log_name for log_name, *_ in cells):
+        chunks = [np.asarray(values) for name, _, _, _, values, _ in cells if name == log_name]
+        values = pd.Series(np.concatenate(chunks), index=row[logs == log_name]).infer_objects()
+        values = values[~values.index.duplicated(keep='last')]
+        data[log_name] = values.reindex(data.index)
     return data
 
 
-def add_height_above_fwl(data: {}, owc: [{str: float}]) -> {}:
-    for values in data.values():
-        owc_level = owc.get(values['Lithology'].replace('O|', '').replace('W|', ''))
-        if owc_level is not None:
-            if values['index'] < owc_level:
-                values['HeightAboveFWL'] = owc_level - values['index']
-                values['Lithology'] = values['Lithology'] + 'O|'
-                continue
-            else:
-                values['Lithology'] = values['Lithology'] + 'W|'
-        values['HeightAboveFWL'] = 0
+def index_to_depth(data: pd.DataFrame, depth: ()) -> pd.DataFrame:
+    data['old_index'] = data['index']
+    data['index'] = depth(data['index'])
+    return data
+
+
+def add_height_above_fwl(data: pd.DataFrame, owc: {str: float}) -> pd.DataFrame:
+    """ HeightAboveFWL has the dtype of the owc levels: int for integer levels, else float """
+    fwl = {n: owc.get(n.replace('O|', '').replace('W|', '')) for n in data['Lithology'].unique()}
+    levels = data['Lithology'].map(fwl).astype(float)
+    above, water = data['index'] < levels, data['index'] >= levels
+
+    height = (levels - data['index']).where(above, 0)
+    data['Lithology'] = data['Lithology'] + np.where(above, 'O|', np.where(water, 'W|', ''))
+    data['HeightAboveFWL'] = height.astype(np.asarray(list(owc.values()) or [0]).dtype)
     return data
 
 
-def edit_lithology_name_in_data(data: {}) -> {}:
-    for values in data.values():
-        values['Lithology'] = cut_along(values['Lithology'], '|')
+def edit_lithology_name_in_data(data: pd.DataFrame) -> pd.DataFrame:
+    data['Lithology'] = data['Lithology'].map({n: cut_along(n, '|')
+                                               for n in data['Lithology'].unique()})
     return data
 
 
-def add_log_expression_in_export(data: dict, logs: {str: [Log]}) -> dict:
+def evaluate_expression(expression: Callable, names: [str], rows: pd.DataFrame) -> pd.Series:
+    """ Expression of the row c on all rows at once, -9999 where a log of names is missing """
+    try:
+        values = expression(rows)
+    except KeyError:
+        return pd.Series(-9999, index=rows.index)
+    except (TypeError, ValueError):
+        # not vectorizable, row by row
+        values = [expression(row) for row in rows.to_dict('records')]
+
+    values = pd.Series(values, index=rows.index, dtype=object) if np.ndim(values) else \
+        pd.Series(values, index=rows.index)
+    return values.where(~rows[names].isna().any(axis=1), -9999)
+
+
+def add_log_expression_in_export(data: pd.DataFrame, logs: {str: [Log]}) -> pd.DataFrame:
     expressions = {}
     expression_logs = list({l for l in [a for b in logs.values() for a in b]
                             if expression_parser(l.text_expression) is not None})
 
     sorted_expression_logs_name = sort_expression_logs(expression_logs)
 
-    texts_expressions = []
     for lay_name, v in logs.items():
         for log in v:
             expr = expression_parser(log.text_expression)
             if expr is None:
                 continue
+            names = [cut_along(n, '|') for n in get_variable_expression(log.text_expression)]
             log_name = cut_along(log.name, '|')
             expressions[log_name] = {} if not expressions.get(log_name) else expressions[log_name]
-            expressions[log_name][lay_name] = expr
+            expressions[log_name][lay_name] = expr, names
             if lay_name.__contains__('|O|') or lay_name.__contains__('|W|'):
                 expressions[log_name][lay_name.replace('O|', '').replace('W|', '')] \
-                    = expr
+                    = expr, names
             else:
-                expressions[log_name].update({lay_name + 'O|': expr,
-                                              lay_name + 'W|': expr})
-
-            texts_expressions.append(log.text_expression)
+                expressions[log_name].update({lay_name + 'O|': (expr, names),
+                                              lay_name + 'W|': (expr, names)})
 
     for log_name_expression in sorted_expression_logs_name:
         short_log_name_expression = cut_along(log_name_expression, '|')
         exps = expressions[short_log_name_expression]
-        for k, v in data.items():
-            try:
-                if exps.get(v['Lithology']):
-                    v[short_log_name_expression] = exps[v['Lithology']](v)
-                if v.get(short_log_name_expression) is None:
-                    v[short_log_name_expression] = -9999
-                    # print(v.get(short_log_name_expression))
-                    # print(v, exps)
-                    # print(short_log_name_expression, expressions)
-                    # breakpoint()
-            except KeyError or AttributeError as l:
-                v[short_log_name_expression] = -9999
-                # print(l)
-                # print(v.get(short_log_name_expression))
-                # print(v, exps)
-                # print(short_log_name_expression, expressions)
-                # print_log(f'{log_name_expression} ; {v.keys()} ; {v["Lithology"]}')
-                # breakpoint()
+        values = data[short_log_name_expression].astype(object) \
+            if short_log_name_expression in data.columns \
+            else pd.Series(None, index=data.index, dtype=object)
 
-    return data
+        for lithology, rows in data.groupby('Lithology', sort=False).groups.items():
+            if exps.get(lithology):
+                expr, names = exps[lithology]
+                values[rows] = evaluate_expression(expr, names, data.loc[rows])
+        data[short_log_name_expression] = values.where(values.notna(), -9999).infer_objects()
 
-
-def add_log_sample_in_export(data: dict, core_samples: [CoreSample], percent: float) -> dict:
-    for k in data.keys():
-        check_percent = random() > percent
-        for name_core_sample, log_name, lithology, null_value in core_samples:
-            data[k][name_core_sample] = null_value
-            if check_percent:
-                continue
-            if data[k]['Lithology'] != lithology:
-                continue
-            if data[k].get(log_name) is None:
-                continue
-            data[k][name_core_sample] = data[k][log_name] * ((random() - 0.5) / 10 + 1)
     return data
 
 
-def prepare_dataframe_to_save(data: dict) -> pd.DataFrame:
-    columns_name = set([a for b in [list(v.keys()) for v in data.values()] for a in b])
-    return pd.DataFrame([row for _, row in data.items()], columns=columns_name)
+def add_log_sample_in_export(data: pd.DataFrame, core_samples: [CoreSample],
+                             percent: float) -> pd.DataFrame:
+    check_percent = np.random.random(len(data)) <= percent
+    for name_core_sample, log_name, lithology, null_value in core_samples:
+        sample = check_percent & (data['Lithology'] == lithology).to_numpy()
+        if log_name in data.columns:
+            sample &= data[log_name].notna().to_numpy()
+        else:
+            sample[:] = False
+
+        noise = (np.random.random(len(data)) - 0.5) / 10 + 1
+        data[name_core_sample] = (data[log_name] * noise).where(sample, null_value) \
+            if sample.any() else null_value
+    return data
 
 
-def save_to_t_nav(data: [], path: str):
+def save_to_t_nav(data: pd.DataFrame, path: str):
     print_log('Start save TNavigator(.inc)')
     data_str = ''
-    df: pd.DataFrame = prepare_dataframe_to_save(data).sort_values(by=['index', 'j']).drop(
+    df: pd.DataFrame = data.sort_values(by=['index', 'j']).drop(
         ['i', 'j', 'index', 'Lithology'], axis=1)
     for data_name, column in df.items():
         data_str += f'{data_name} '
@@ -206,13 +227,13 @@ def save_to_t_nav(data: [], path: str):
     print_log(f'Numer of ceil: {len(df)}')
 
 
-def save_to_excel(data: [], path: str):
+def save_to_excel(data: pd.DataFrame, path: str):
     print_log('Start save Excel (.xlsx)')
-    prepare_dataframe_to_save(data).to_excel(path, sheet_name='all')
+    data.to_excel(path, sheet_name='all')
     print_log('Export to Excel(.xlsx) is finish save to:' + path)
 
 
-def save_to_csv(data: [], path: str):
+def save_to_csv(data: pd.DataFrame, path: str):
     print_log('Start save .csv')
-    prepare_dataframe_to_save(data).to_csv(path, index=False, sep=';', decimal=',')
+    data.to_csv(path, index=False, sep=';', decimal=',')
     print_log('Export to .csv is finish save to:' + path)
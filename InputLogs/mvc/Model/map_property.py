@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 import random
+from itertools import groupby
+from operator import itemgetter
 from typing import Union, Optional
 
+import numpy as np
+import pandas as pd
+
 from InputLogs.mvc.Model.log_curves import Log
 from utils.file import dict_from_json
 from utils.realistic_transition import realistic_transition
+from utils.transform_data_to_export import IntervalTable, BODY, S, E
 
 interval = [[float], str, [float]]
 # [('core_sample_name', 'lithology_name', 'log_name', 'percent_safety(in 0...1)'  , 'null_val')]
@@ -78,12 +84,13 @@ class ColumnIntervals:
 
 class MapProperty:
     __slots__ = 'columns', 'body_names', 'attach_logs', '_visible_names', 'core_samples', \
-                'interval_data', 'max_x', 'max_y', 'max_z', 'path_map', 'owc', 'export_data', \
-                'all_logs', 'export', 'percent_safe_core', 'initial_depth', 'step_depth', \
-                'settings', '__select_log', 'path_map',
+                'max_x', 'max_y', 'max_z', 'path_map', 'owc', 'export_data', \
+                '__all_logs', 'export', 'percent_safe_core', 'initial_depth', 'step_depth', \
+                'settings', '__select_log', 'path_map', 'intervals', '__logs', '__sub_logs'
 
     def __init__(self, path_map: Optional[str] = None, path_log: Optional[str] = None):
-        self.columns, self.interval_data = {}, {}
+        self.columns = {}
+        self.intervals = IntervalTable()
         self.export_data, self.__select_log = None, None
         self._visible_names, self.body_names, self.all_logs = [], [], []
         self.max_x, self.max_y, self.max_z = 0, 0, 0
@@ -100,10 +107,28 @@ class MapProperty:
             self.load_log(dict_from_json(path_log))
 
     def map_copy(self) -> MapProperty:
-        map_c = MapProperty(path_map=self.path_map)
+        map_c = MapProperty()
+        map_c.load_map(self.intervals)
         map_c.load_log(self.save())
         return map_c
 
+    @property
+    def all_logs(self) -> [Log]:
+        """ Change it with add_logs, pop_logs or a new list, the name indexes follow them """
+        return self.__all_logs
+
+    @all_logs.setter
+    def all_logs(self, value: [Log]):
+        self.__all_logs = value
+        self.__index_logs()
+
+    def __index_logs(self):
+        # name: first Log of the name, main name (before '.'): [Log] in all_logs order
+        self.__logs, self.__sub_logs = {}, {}
+        for log in self.__all_logs:
+            self.__logs.setdefault(log.name, log)
+            self.__sub_logs.setdefault(cut_along(log.name, '.'), []).append(log)
+
     @property
     def visible_names(self) -> [str]:
         return self._visible_names.copy() + self.visible_owc_names()
@@ -134,17 +159,19 @@ class MapProperty:
                     self.get_logs_by_name(log) is not None]
                 for k, v in data['attach_logs'].items()}
 
-    def load_map(self, data: dict):
-        self.interval_data = data
+    def load_map(self, data: Union[dict, IntervalTable]):
+        if type(data) is IntervalTable:
+            self.intervals = data.copy()
+        else:
+            self.intervals = IntervalTable.from_dict({k: v for k, v in data.items()
+                                                      if k not in self.__slots__})
+        self.intervals.body_names = [last_char_is(n, '|') for n in self.intervals.body_names]
+        self.body_names = [self.intervals.body_names[i] for i in np.unique(self.intervals.body)]
 
-        self.body_names = []
-        for b_name in [k for k in data.keys() if k not in self.__slots__]:
-            body_name = last_char_is(b_name, '|')
-            data[body_name] = data.pop(b_name)
-            self.body_names.append(body_name)
-            for x, y in [(x1, y1) for x1 in data[body_name] for y1 in data[body_name][x1]]:
-                self.max_x, self.max_y = max(self.max_x, int(x)), max(self.max_y, int(y))
-                self.max_z = max([s_e['e'] for s_e in data[body_name][x][y]] + [self.max_z])
+        if len(self.intervals):
+            self.max_x = max(self.max_x, int(self.intervals.x.max()))
+            self.max_y = max(self.max_y, int(self.intervals.y.max()))
+            self.max_z = max(self.max_z, int(self.intervals.e.max()))
 
         self._visible_names = self.body_names.copy()
 
@@ -167,8 +194,7 @@ class MapProperty:
                 b]
 
     def get_logs_by_name(self, name: str) -> Optional[Log]:
-        logs = [v for v in self.all_logs if v.name == name]
-        return None if len(logs) == 0 else logs[0]
+        return self.__logs.get(name)
 
     def add_core_sample(self, core_sample: CoreSample):
         name, log_name, lithology_name, null_value = core_sample
@@ -179,8 +205,7 @@ class MapProperty:
         self.core_samples = [c_s for c_s in self.core_samples if c_s != core_sample]
 
     def sub_logs(self, log_name: str) -> [Log]:
-        return [log for log in self.all_logs if
-                cut_along(log.name, '.') == cut_along(log_name, '.')]
+        return list(self.__sub_logs.get(cut_along(log_name, '.'), []))
 
     def attach_log_to_layer(self, log_name: str, lay_name: str):
         o_or_w = 'O|' if lay_name.__contains__('|O') else 'W|' if lay_name.__contains__(
@@ -209,12 +234,11 @@ class MapProperty:
         return list({cut_along(v, '|') for v in self.main_logs_name_owc()})
 
     def main_logs_name_non_expression(self) -> [str]:
-        names = [v.name for v in [i for i in self.all_logs if i.text_expression == ''] if
-                 not v.name.__contains__('.')]
-        return list({cut_along(v, '|') for v in names})
+        return list({cut_along(main, '|') for main, logs in self.__sub_logs.items()
+                     if any(log.name == main and log.text_expression == '' for log in logs)})
 
     def main_logs_name_owc(self) -> [str]:
-        return list({cut_along(v.name, '.') for v in self.all_logs})
+        return list(set(self.__sub_logs))
 
     def main_body_names_owc(self) -> [str]:
         m_names = set(self.main_body_names())
@@ -238,8 +262,10 @@ class MapProperty:
 
     def change_log_select(self, main_name: str):
         self.select_log = main_name
-        cut_to_main: () = lambda name: cut_along(cut_along(name, '.'), '|')
-        [setattr(log, 'main', cut_to_main(log.name) == main_name) for log in self.all_logs]
+        for main, logs in self.__sub_logs.items():
+            selected = cut_along(main, '|') == main_name
+            for log in logs:
+                log.main = selected
 
     def pop_logs(self, log_name: str):
         indexes = [i for i in range(len(self.all_logs)) if self.all_logs[i].name == log_name]
@@ -255,6 +281,7 @@ class MapProperty:
         self.attach_logs = {k: [log for log in self.attach_logs[k] if log in self.all_logs] for k, v
                             in
                             self.attach_logs.items()}
+        self.__index_logs()
 
     def get_logs(self, name: str) -> []:
         return [] if self.attach_logs.get(name) is None else self.attach_logs.get(name)
@@ -262,48 +289,51 @@ class MapProperty:
     def get_one_log(self, name: str) -> Optional[Log]:
         x = [v.name for v in self.get_logs(name) if v.main]
         if x:
-            if self.sub_logs(x[0]):
-                return random.choice(self.sub_logs(x[0]))
+            logs = self.__sub_logs.get(cut_along(x[0], '.'))
+            if logs:
+                return random.choice(logs)
 
     def add_logs(self, log: Log):
         self.all_logs.append(log)
-        logs = list(
-            filter(lambda i: cut_along(i.name, '.') == cut_along(log.name, '.'), self.all_logs))
+        logs = self.__sub_logs.setdefault(cut_along(log.name, '.'), [])
+        logs.append(log)
+        for sub_log in logs:
+            if self.__logs.get(sub_log.name) is sub_log:
+                self.__logs.pop(sub_log.name)
         sub_name_order_update(logs)
+        for sub_log in logs:
+            self.__logs.setdefault(sub_log.name, sub_log)
 
     def get_column(self, x: Union[int, str], y: Union[int, str]) -> [{str: [dict]}]:
-        columns = [self.get_column_body(x, y, name) for name in self.body_names]
-        return [a for b in columns for a in b]
+        rows = self.intervals.column(int(x), int(y)).tolist()
+        return [a for body, body_rows in groupby(rows, key=itemgetter(BODY)) for a in
+                self.body_intervals(self.intervals.body_names[body], list(body_rows))]
 
     def get_column_body(self, x: Union[int, str], y: Union[int, str], body_name: str) -> \
             {str: [dict]}:
-        try:
-            if self.owc.get(body_name) is not None:
-                interval_column = self.interval_data[body_name][str(x)][str(y)]
-                interval_column_w, interval_column_o = [], []
-                body_name_o = last_char_is(body_name, '|') + 'O|'
-                body_name_w = last_char_is(body_name, '|') + 'W|'
-
-                if self.get_one_log(body_name_o) and self.get_one_log(body_name_w):
-                    for s_e, i in zip(interval_column, range(len(interval_column))):
-                        if s_e['s'] <= self.owc[body_name] <= s_e['e']:
-                            interval_column_o.append(
-                                {'name': body_name_o, 's': s_e['s'], 'e': self.owc[body_name] - 1})
-                            interval_column_w.append(
-                                {'name': body_name_w, 's': self.owc[body_name], 'e': s_e['e']})
-                        elif interval_column_w is []:
-                            interval_column_o.append(
-                                {'name': body_name_o, 's': s_e['s'], 'e': s_e['e']})
-                        else:
-                            interval_column_w.append(
-                                {'name': body_name_w, 's': s_e['s'], 'e': s_e['e']})
-
-                    return interval_column_o + interval_column_w
-
-            return [{'name': last_char_is(body_name, '|'), 's': col['s'], 'e': col['e']} for col in
-                    self.interval_data[body_name][str(x)][str(y)]]
-        except KeyError or IndexError:
+        if body_name not in self.intervals.body_names:
             return []
+        body = self.intervals.body_names.index(body_name)
+        rows = self.intervals.column(int(x), int(y)).tolist()
+        return self.body_intervals(body_name, [row for row in rows if row[BODY] == body])
+
+    def body_intervals(self, body_name: str, rows: [[int]]) -> [dict]:
+        """ Interval rows of a body in a column, split by the owc if it has O| and W| logs """
+        if not rows:
+            return []
+        owc = self.owc.get(body_name)
+        if owc is not None:
+            body_name_o = last_char_is(body_name, '|') + 'O|'
+            body_name_w = last_char_is(body_name, '|') + 'W|'
+
+            if self.get_one_log(body_name_o) and self.get_one_log(body_name_w):
+                return [{'name': body_name_o, 's': row[S], 'e': owc - 1}
+                        for row in rows if row[S] <= owc <= row[E]] + \
+                    [{'name': body_name_w, 's': owc if row[S] <= owc <= row[E] else row[S],
+                      'e': row[E]} for row in rows]
+
+        body_name = last_char_is(body_name, '|')
+        return [{'name': body_name, 's': row[S], 'e': row[E]} for row in rows]
 
     @property
     def select_log(self):
@@ -317,17 +347,17 @@ class MapProperty:
 
     def get_column_curve(self, x: int, y: int) -> Optional[ColumnIntervals]:
         if self.export_data is not None:
-            self.export_data: dict = self.export_data
-            curves = [i for i in self.export_data.values() if
-                      i.get('i') == x + 1 and i.get('j') == y + 1]
+            data: pd.DataFrame = self.export_data
+            curves = data[(data['i'] == x + 1) & (data['j'] == y + 1)]
 
             if self.select_log is None:
                 self.select_log = self.main_logs_name()[0] if self.main_logs_name() else None
             name_log = self.select_log
 
             if name_log:
-                curve = [i.get(name_log) for i in curves]
-                indexes = [i.get('index') for i in curves]
+                values = curves.get(name_log, pd.Series(None, index=curves.index, dtype=object))
+                curve = values.astype(object).where(values.notna(), None).tolist()
+                indexes = curves['index'].tolist()
 
                 column = ColumnIntervals()
                 if curve:
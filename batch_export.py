@@ -0,0 +1,80 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from traceback import format_exc
+from typing import Optional
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+os.environ.setdefault('input_logs', os.getcwd())
+
+from InputData.mvc.Model.lithological_model import LithologicalModel, ExportMap
+from InputLogs.mvc.Model.map import Map
+from InputLogs.mvc.Model.map_export import save_to_csv, save_to_excel, save_to_t_nav
+from utils.file import FileEdit, dict_from_json, save_dict_as_json
+from utils.log.log_file import print_log
+from utils.notification import set_notifier
+
+savers = {'csv': save_to_csv, 'xlsx': save_to_excel, 'inc': save_to_t_nav}
+
+
+def export_project(project_path: str, formats: [str], output: Optional[str] = None) -> [str]:
+    """ Model (data.model) and logs (log.log) of a project to polygon.model and formats files """
+    project_path = project_path.rstrip('/\\')
+    file_edit = FileEdit(project_path)
+    if not os.path.isfile(f'{project_path}/{FileEdit.data_model_name}'):
+        raise FileNotFoundError(f'{project_path}/{FileEdit.data_model_name}')
+
+    lithological_model = LithologicalModel()
+    lithological_model.load_from_json(file_edit.model_path)
+    export_map = ExportMap(lithological_model)
+    set_notifier(lambda title, text: print_log(f'{project_path}: {title}\n{text}'))
+    save_dict_as_json(export_map(), project_path, file_edit.polygon_model_path)
+
+    data_map = Map()
+    data_map.load_map(export_map.intervals)
+    data_map.load_log(dict_from_json(file_edit.log_path))
+    data_map.export.export()
+
+    name = os.path.splitext(os.path.basename(project_path))[0]
+    paths = [f'{output or project_path}/{name}.{file_format}' for file_format in formats]
+    for file_format, path in zip(formats, paths):
+        savers[file_format](data_map.export_data, path)
+    return paths
+
+
+def export_projects(projects: [str], formats: [str], output: Optional[str] = None,
+                    max_workers: Optional[int] = None) -> {str: Optional[str]}:
+    """ Errors by project, None if the project was exported """
+    if output:
+        os.makedirs(output, exist_ok=True)
+    errors = {}
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = {executor.submit(export_project, path, formats, output): path
+                   for path in projects}
+        for future in as_completed(futures):
+            try:
+                print_log(f'Export finish: {future.result()}')
+                errors[futures[future]] = None
+            except Exception:
+                errors[futures[future]] = format_exc()
+                print_log(f'Export error {futures[future]}:\n{errors[futures[future]]}')
+    return errors
+
+
+def main(args: [str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Export projects (*.oilcase) without GUI')
+    parser.add_argument('projects', nargs='+', help='project directories')
+    parser.add_argument('-f', '--format', dest='formats', action='append',
+                        choices=list(savers.keys()), help='output format, csv by default')
+    parser.add_argument('-o', '--output', help='output directory, project directory by default')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of projects exported at once, all cores by default')
+    options = parser.parse_args(args)
+
+    errors = export_projects(options.projects, options.formats or ['csv'], options.output,
+                             options.jobs)
+    return int(any(errors.values()))
+
+
+if __name__ == '__main__':
+    exit(main())
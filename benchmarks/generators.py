@@ -0,0 +1,115 @@
+import math
+import random
+
+import numpy as np
+
+from InputData.mvc.Model.line_segment import LineSegment
+from InputData.mvc.Model.lithological_model import LithologicalModel
+from InputData.mvc.Model.lithology import Lithology
+from InputData.mvc.Model.point import Point
+from InputData.mvc.Model.size import Size
+from InputData.mvc.Model.split import Split
+from InputData.mvc.Model.surface import Surface
+from InputLogs.mvc.Model.log_curves import Log
+from InputLogs.mvc.Model.map import Map
+from res.strings import Limits
+from utils.transform_data_to_export import IntervalTable
+
+
+class BenchSize(Size):
+    """ Size with a grid other than the 25 * 25 * 500 of Size """
+    __slots__ = ['_x', '_y', '_z']
+
+    def __init__(self, x: int = 25, y: int = 25, z: int = 500):
+        super(BenchSize, self).__init__(x_end=x, y_end=y, z_end=z)
+        self._x, self._y, self._z = x, y, z
+
+    @property
+    def x(self) -> int:
+        return self._x
+
+    @property
+    def y(self) -> int:
+        return self._y
+
+    @property
+    def z(self) -> int:
+        return self._z
+
+
+def random_contour(rnd: random.Random, dot_count: int) -> ([float], [float]):
+    scale = Limits.BASE_PLOT_SCALE
+    cx, cy = rnd.uniform(0.3, 0.7) * scale, rnd.uniform(0.3, 0.7) * scale
+    r = rnd.uniform(0.1, 0.35) * scale
+    angles = [2 * math.pi * i / dot_count for i in range(dot_count)]
+    radius = [r * rnd.uniform(0.7, 1.2) for _ in angles]
+    return [round(cx + rr * math.cos(a), 3) for a, rr in zip(angles, radius)], \
+           [round(cy + rr * math.sin(a), 3) for a, rr in zip(angles, radius)]
+
+
+def make_lithology(rnd: random.Random, size: Size, name: str, layers: int,
+                   dot_count: int = 12) -> Lithology:
+    lithology = Lithology(size=size)
+    lithology.name, lithology.priority, lithology.layers = name, rnd.randint(2, 100), []
+
+    step = max(1, (size.z - 1) // (layers + 1))
+    z = rnd.randint(0, max(0, size.z - 1 - step * layers))
+    for _ in range(layers):
+        surface = Surface(size=size)
+        for x, y in zip(*random_contour(rnd, dot_count)):
+            surface.add_dot(x, y)
+        surface.z = z
+        lithology.layers.append(surface)
+        z += rnd.randint(max(1, step // 2), step)
+    return lithology
+
+
+def make_model(grid: int = 25, lithologies: int = 3, layers: int = 3, seed: int = 0,
+               splits: bool = True, roof: bool = True, z: int = 500) -> LithologicalModel:
+    """ lithologies with layers primary layers each, filler, split and roof profile """
+    rnd = random.Random(seed)
+    model = LithologicalModel()
+    model.size = BenchSize(grid, grid, z)
+    for i in range(lithologies):
+        model.add_layer(make_lithology(rnd, model.size, f'L{i}', layers))
+
+    filler = Lithology(size=model.size)
+    filler.name = 'filler'
+    filler.set_filler(True)
+    model.add_layer(filler)
+
+    if splits:
+        split = Split()
+        split.line, split.angle = LineSegment(Point(0.0, 0.4), Point(1.0, 0.6)), 60
+        model.splits[0] = split
+    if roof:
+        scale = Limits.BASE_PLOT_SCALE
+        for _ in range(4):
+            model.roof_profile.add(rnd.uniform(0, scale), rnd.uniform(0, scale),
+                                   rnd.randint(0, 20))
+        model.roof_profile.values_corner_points = {k: rnd.randint(0, 10)
+                                                   for k in ('ll', 'lr', 'ul', 'ur')}
+    return model
+
+
+def make_roof_points(base: int, count: int, seed: int = 0) -> (np.ndarray, np.ndarray):
+    """ Corners and count random points of a roof profile on the base * base grid """
+    rnd = np.random.default_rng(seed)
+    points = np.concatenate([[[0, 0], [0, base], [base, 0], [base, base]],
+                             rnd.uniform(0, base, [count, 2])])
+    return points, rnd.integers(0, 20, len(points)).astype(float)
+
+
+def make_map(intervals: IntervalTable, seed: int = 0) -> Map:
+    """ Map of an exported model with two trend logs and an expression log on every body """
+    rnd = random.Random(seed)
+    data_map = Map()
+    data_map.load_map(intervals)
+    data_map.all_logs = [
+        Log(data_map, {'name': 'GR|', 'min': 10, 'max': 90, 'dispersion': 0.85}),
+        Log(data_map, {'name': 'PHI|', 'min': 0.1, 'max': 0.3, 'dispersion': 0.85}),
+        Log(data_map, {'name': 'PHI2|', 'text_expression': '{PHI|} * 2'})]
+    data_map.attach_logs = {name: data_map.all_logs.copy() for name in data_map.body_names}
+    if data_map.body_names:
+        data_map.owc = {rnd.choice(data_map.body_names): data_map.max_z // 2}
+    return data_map
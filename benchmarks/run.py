@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+
+os.environ.setdefault('input_logs', tempfile.gettempdir())
+
+from benchmarks.generators import make_model, make_map, make_roof_points
+from InputData.mvc.Model.lithological_model import ExportMap
+from InputLogs.mvc.Model.map_export import save_to_csv, save_to_excel, save_to_t_nav
+from utils.roof_interpolation import interpolate_grid, interpolators
+
+# name: (grid, lithologies, layers)
+presets = {
+    'small': (25, 1, 10),
+    'medium': (100, 10, 50),
+    'large': (250, 50, 500),
+}
+
+
+def timeit(function: Callable, repeat: int, setup: Callable = lambda: None) -> [float]:
+    times = []
+    for _ in range(repeat):
+        random.seed(0)
+        np.random.seed(0)
+        setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+class Cases:
+    """ Every case of a preset, shared state is built lazily and reused between cases """
+
+    def __init__(self, grid: int, lithologies: int, layers: int, seed: int = 0):
+        self.grid, self.lithologies, self.layers, self.seed = grid, lithologies, layers, seed
+        self.model = make_model(grid, lithologies, layers, seed)
+        self.__export_map: Optional[ExportMap] = None
+        self.__data_map = None
+        self.roof_points = make_roof_points(grid, grid * 4, seed)
+        self.__roof_grids = {}
+        self.directory = tempfile.mkdtemp(prefix='input_bench_')
+
+    @property
+    def params(self) -> dict:
+        return {'grid': self.grid, 'lithologies': self.lithologies, 'layers': self.layers,
+                'seed': self.seed}
+
+    def calc_intermediate_layers(self):
+        for shape in self.model.shapes:
+            shape.calc_intermediate_layers()
+
+    @property
+    def export_map(self) -> ExportMap:
+        if self.__export_map is None:
+            self.__export_map = ExportMap(self.model)
+            self.__export_map()
+        return self.__export_map
+
+    @property
+    def data_map(self):
+        if self.__data_map is None:
+            self.__data_map = make_map(self.export_map.intervals, self.seed)
+            self.__data_map.export.export()
+        return self.__data_map
+
+    def roof_grid(self, method: str) -> np.ndarray:
+        self.__roof_grids[method] = interpolate_grid(*self.roof_points, self.grid, method)
+        return self.__roof_grids[method]
+
+    def drop_roof_grid(self):
+        """ add and pop of a point clear the offset grid cached on the roof profile """
+        self.model.roof_profile.add(-1.0, -1.0, 0)
+        self.model.roof_profile.pop(-1.0, -1.0)
+
+    def deviation(self, name: str) -> Optional[float]:
+        """ Max difference of a roof_<method> case grid from the cubic one """
+        method = name[len('roof_'):]
+        if not name.startswith('roof_') or method not in interpolators:
+            return None
+        cubic = self.__roof_grids.get('cubic')
+        cubic = self.roof_grid('cubic') if cubic is None else cubic
+        grid = self.__roof_grids.get(method)
+        grid = self.roof_grid(method) if grid is None else grid
+        return float(np.nanmax(np.abs(grid - cubic)))
+
+    def cases(self) -> {str: (Callable, Callable)}:
+        """ name: (function, setup) """
+        model, path = self.model, lambda ext: f'{self.directory}/export.{ext}'
+        return {
+            'calc_intermediate_layers': (self.calc_intermediate_layers, lambda: None),
+            'splitting_shape': (lambda: [s.splitting_shape(model.splits) for s in model.shapes],
+                                self.calc_intermediate_layers),
+            'get_x_y_offset': (lambda: model.roof_profile.get_x_y_offset(
+                base=max(model.size.x, model.size.y)), self.drop_roof_grid),
+            'export_map': (lambda: self.export_map.export(), lambda: self.export_map),
+            'export_logs': (lambda: self.data_map.export.export(), lambda: self.data_map),
+            'save_to_csv': (lambda: save_to_csv(self.data_map.export_data, path('csv')),
+                            lambda: self.data_map),
+            'save_to_excel': (lambda: save_to_excel(self.data_map.export_data, path('xlsx')),
+                              lambda: self.data_map),
+            'save_to_t_nav': (lambda: save_to_t_nav(self.data_map.export_data, path('inc')),
+                              lambda: self.data_map),
+            **{f'roof_{method}': (lambda m=method: self.roof_grid(m), lambda: None)
+               for method in interpolators},
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))
+                                       ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(preset_names: [str], case_names: [str] = None, repeat: int = 3) -> dict:
+    results = []
+    for preset in preset_names:
+        grid, lithologies, layers = presets[preset]
+        print(f'preset {preset}: grid {grid}, lithologies {lithologies}, layers {layers}')
+        cases = Cases(grid, lithologies, layers)
+        for name, (function, setup) in cases.cases().items():
+            if case_names and name not in case_names:
+                continue
+            times = timeit(function, repeat, setup)
+            result = {'preset': preset, 'case': name, 'params': cases.params,
+                      'times': times, 'min': min(times), 'median': statistics.median(times)}
+            deviation = cases.deviation(name)
+            if deviation is not None:
+                result['deviation'] = deviation
+            results.append(result)
+            print(f'  {name:<26}{min(times):>10.4f} s' +
+                  ('' if deviation is None else f'{deviation:>10.3f} from cubic'))
+    return {'commit': git_commit(), 'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'repeat': repeat, 'results': results}
+
+
+def compare(old: dict, new: dict):
+    key: Callable = lambda result: (result['preset'], result['case'])
+    old_results = {key(r): r for r in old['results']}
+    print(f'{"preset":<8}{"case":<26}{"old, s":>10}{"new, s":>10}{"ratio":>8}')
+    for result in new['results']:
+        if key(result) in old_results:
+            old_min = old_results[key(result)]['min']
+            print(f'{result["preset"]:<8}{result["case"]:<26}{old_min:>10.4f}'
+                  f'{result["min"]:>10.4f}{result["min"] / old_min:>8.2f}')
+
+
+def main(args: [str] = None):
+    parser = argparse.ArgumentParser(description='Benchmarks of InputData and InputLogs')
+    parser.add_argument('-p', '--preset', dest='presets', action='append',
+                        choices=list(presets.keys()), help='model size, small by default')
+    parser.add_argument('-c', '--case', dest='cases', action='append',
+                        help='case name, all cases by default')
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-o', '--output', default='bench_output.json')
+    parser.add_argument('--compare', help='previous output to compare with')
+    options = parser.parse_args(args)
+
+    output = run(options.presets or ['small'], options.cases, options.repeat)
+    with open(options.output, 'w') as f:
+        json.dump(output, f, indent=1)
+    if options.compare:
+        with open(options.compare) as f:
+            compare(json.load(f), output)
+
+
+if __name__ == '__main__':
+    main()
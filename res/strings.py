@@ -25,6 +25,8 @@ class Limits(Const):
     WIDTH = 25
     LENGTH = 25
     BASE_PLOT_SCALE = 25
+    MIN_RUN_LENGTH = 4
+    UNDO_MEMORY = 2 ** 18
 
 
 class TitleName:
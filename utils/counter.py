@@ -6,3 +6,12 @@ class Counter:
         Counter.value += 1
         return Counter.value
 
+
+class Generation:
+    """ Bumped by every edit of a lithological model, caches keep the value they were built at """
+    value = 0
+
+    @staticmethod
+    def step() -> int:
+        Generation.value += 1
+        return Generation.value
@@ -6,7 +6,8 @@ from os.path import isfile
 from typing import Optional
 
 import pandas as pd
-from PyQt5.QtWidgets import QFileDialog, QInputDialog, QMessageBox
+
+from utils.notification import notify
 
 
 def dict_from_json(filename: str) -> dict:
@@ -112,11 +113,13 @@ class FileEdit:
         save_dict_as_json(data=data, filename=self.project_path)
 
     def open_file(self, file_extension='json'):
+        from PyQt5.QtWidgets import QFileDialog
         message = f'{file_extension} Files (*.{file_extension})'
         self.project_path, _ = QFileDialog.getOpenFileName(None, '', getcwd(), message)
         return self.project_path
 
     def create_file(self, message=None, extension: str = '', filename: str = '') -> Optional[str]:
+        from PyQt5.QtWidgets import QFileDialog, QInputDialog
         if not message:
             message = self.create_file_default
         filename, ok = QInputDialog.getText(None, 'Input Dialog', str(message)) \
@@ -132,11 +135,13 @@ class FileEdit:
         return None
 
     def open_project(self):
+        from PyQt5.QtWidgets import QFileDialog
         self.project_path = QFileDialog.getExistingDirectory(None, '', getcwd())
         if self.project_path:
             return self.project_path
 
     def create_project(self) -> Optional[str]:
+        from PyQt5.QtWidgets import QFileDialog, QInputDialog
         name, ok = QInputDialog.getText(None, 'Input Dialog', str(FileEdit.create_project_default))
         if not ok or name == '':
             return
@@ -149,7 +154,4 @@ class FileEdit:
             save_dict_as_json({}, self.project_path, 'data.model')
             return self.project_path
         except FileExistsError as e:
-            msg = QMessageBox()
-            msg.setWindowTitle("Project create error")
-            msg.setText(str(e))
-            msg.exec_()
+            notify("Project create error", str(e))
@@ -0,0 +1,65 @@
+import numpy as np
+
+from utils.transform_data_to_export import IntervalTable, X, Y, S, E, BODY
+
+
+class FillReport:
+    __slots__ = 'size_z', 'counts', 'over_filled', 'under_filled', 'overlaps'
+
+    def __init__(self, size_z: int, counts: np.ndarray, overlaps: {str: int}):
+        self.size_z = size_z
+        self.counts = counts
+        self.over_filled: [(int, int, int)] = column_list(counts, counts > size_z)
+        self.under_filled: [(int, int, int)] = column_list(counts, counts < size_z)
+        self.overlaps = overlaps
+
+    @property
+    def cell_number(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def target(self) -> int:
+        return self.counts.size * self.size_z
+
+    @property
+    def valid(self) -> bool:
+        return not (self.over_filled or self.under_filled or self.overlaps)
+
+    def message(self) -> str:
+        column_error = [(f'{x}-{y}', v) for x, y, v in sorted(self.over_filled + self.under_filled)]
+        text = f"Ceil number {self.cell_number} - target{self.target}.\n\n" \
+               f"Error in column: {column_error}"
+        if self.overlaps:
+            text += f"\n\nOverlaps: {self.overlaps}"
+        return text
+
+
+def column_list(counts: np.ndarray, mask: np.ndarray) -> [(int, int, int)]:
+    x, y = np.nonzero(mask)
+    return list(zip(x.tolist(), y.tolist(), counts[x, y].tolist()))
+
+
+def coverage_cube(intervals: IntervalTable, size_z: int) -> np.ndarray:
+    """ How many intervals cover every cell, (size_x, size_y, size_z) """
+    rows = intervals.rows
+    step = np.zeros([intervals.size_x, intervals.size_y, size_z + 1], dtype=np.int16)
+    np.add.at(step, (rows[:, X], rows[:, Y], rows[:, S]), 1)
+    np.add.at(step, (rows[:, X], rows[:, Y], rows[:, E] + 1), -1)
+    return np.cumsum(step, axis=-1, dtype=np.int16)[..., :-1]
+
+
+def fill_report(intervals: IntervalTable, size_z: int) -> FillReport:
+    rows = intervals.rows
+    cube_z = max(size_z, int(rows[:, E].max(initial=size_z - 1)) + 1)
+    coverage = coverage_cube(intervals, cube_z)
+    counts = intervals.column_counts()
+
+    overlap = np.zeros(coverage.shape[:2] + (cube_z + 1,), dtype=np.int32)
+    np.cumsum(coverage > 1, axis=-1, out=overlap[..., 1:])
+    body_overlap = overlap[rows[:, X], rows[:, Y], rows[:, E] + 1] - \
+        overlap[rows[:, X], rows[:, Y], rows[:, S]]
+    per_body = np.bincount(rows[:, BODY], weights=body_overlap,
+                           minlength=len(intervals.body_names))
+    overlaps = {name: int(n) for name, n in zip(intervals.body_names, per_body) if n > 0}
+
+    return FillReport(size_z, counts, overlaps)
@@ -1,6 +1,8 @@
 import math
 from typing import Tuple, List, Optional
 
+import numpy as np
+
 from InputData.mvc.Model.point import Point
 
 
@@ -57,3 +59,31 @@ def intersection_segment_dot(a: Point, b: Point, c: Point, d: Point, vector=Fals
         if vector:
             return x, y
     return None, None
+
+
+def intersection_segments(a_x: np.ndarray, a_y: np.ndarray, b_x: np.ndarray, b_y: np.ndarray,
+                          c_x: np.ndarray, c_y: np.ndarray, d_x: np.ndarray, d_y: np.ndarray) -> \
+        (np.ndarray, np.ndarray, np.ndarray):
+    """ intersection_segment_dot of broadcast arrays of segments ab and cd, (x, y, found) """
+    a_x, a_y, b_x, b_y, c_x, c_y, d_x, d_y = np.broadcast_arrays(
+        *[np.asarray(i, dtype=np.float64) for i in (a_x, a_y, b_x, b_y, c_x, c_y, d_x, d_y)])
+    swap = a_y - b_y == 0
+    a_x, a_y, b_x, b_y, c_x, c_y, d_x, d_y = [np.where(swap, j, i) for i, j in zip(
+        (a_x, a_y, b_x, b_y, c_x, c_y, d_x, d_y), (c_x, c_y, d_x, d_y, a_x, a_y, b_x, b_y))]
+
+    a1, a2 = a_y - b_y, c_y - d_y
+    b1, b2 = b_x - a_x, d_x - c_x
+    c1, c2 = a_x * b_y - b_x * a_y, c_x * d_y - d_x * c_y
+    det = b1 * a2 - b2 * a1
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = (c2 * a1 - c1 * a2) / det
+        x = (-c1 - b1 * y) / np.where(a1 != 0, a1, 0.001)
+        x, y = np.round(x * 1000) / 1000, np.round(y * 1000) / 1000
+
+    def near(v: np.ndarray, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        return (np.minimum(p, q) - 0.01 <= v) & (v <= np.maximum(p, q) + 0.01)
+
+    found = (det != 0) & near(x, a_x, b_x) & near(y, a_y, b_y) & near(x, c_x, d_x) & \
+        near(y, c_y, d_y)
+    return x, y, found
@@ -1,5 +1,3 @@
-from matplotlib import pyplot as plt
-
 import random
 
 
@@ -15,6 +13,8 @@ def intersection_point_horizontal_plane(a: [float, float, float],
 
 
 if __name__ == '__main__':
+    from matplotlib import pyplot as plt
+
     rand: () = lambda: random.randint(0, 15)
     random_int: () = lambda: random.randint(0, 15)
 
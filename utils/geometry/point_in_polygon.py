@@ -1,3 +1,8 @@
+import numpy as np
+
+MAX_CHUNK_SIZE = 2 ** 22
+
+
 def check_point_in_polygon(curves_x: [float], curves_y: [float], x: float, y: float) -> bool:
     entry, j = False, len(curves_x) - 1
 
@@ -20,3 +25,68 @@ def check_polygon_in_polygon(curves_x: [float], curves_y: [float], x: [float], y
             return entry
 
     return entry
+
+
+def polygon_edges(curves_x: [float], curves_y: [float]) -> \
+        (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+    x_i, y_i = np.asarray(curves_x, dtype=np.float64), np.asarray(curves_y, dtype=np.float64)
+    return x_i, y_i, np.roll(x_i, 1, axis=-1), np.roll(y_i, 1, axis=-1)
+
+
+def ray_cast(x_i: np.ndarray, y_i: np.ndarray, x_j: np.ndarray, y_j: np.ndarray,
+             x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """ Edges (..., E) against points (..., N), same float operations as check_point_in_polygon """
+    entry = np.zeros(np.broadcast_shapes(x_i.shape[:-1] + (1,), x.shape), dtype=bool)
+    x, y = x[..., None, :], y[..., None, :]
+    step = max(1, MAX_CHUNK_SIZE // max(1, entry.size))
+
+    for start in range(0, x_i.shape[-1], step):
+        edge = (Ellipsis, slice(start, start + step), None)
+        a_x, a_y, b_x, b_y = x_i[edge], y_i[edge], x_j[edge], y_j[edge]
+        cross = ((a_y < y) & (y <= b_y)) | ((b_y < y) & (y <= a_y))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hits = cross & (a_x + (y - a_y) / (b_y - a_y) * (b_x - a_x) < x)
+        entry ^= np.logical_xor.reduce(hits, axis=-2)
+
+    return entry
+
+
+def check_points_in_polygon(curves_x: [float], curves_y: [float], x: np.ndarray,
+                            y: np.ndarray) -> np.ndarray:
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    entry = ray_cast(*polygon_edges(curves_x, curves_y), x.ravel(), y.ravel())
+    return entry.reshape(x.shape)
+
+
+def check_polygons_in_polygon(curves_x: [float], curves_y: [float], x: np.ndarray,
+                              y: np.ndarray) -> np.ndarray:
+    """ x, y - (..., 4) corners of cells, result - (...) """
+    return check_points_in_polygon(curves_x, curves_y, x, y).any(axis=-1)
+
+
+def pad_polygons(polygons_x: [[float]], polygons_y: [[float]]) -> (np.ndarray, np.ndarray):
+    # repeated last dot adds only zero length edges, empty polygon has no edges at all
+    count = max([len(p) for p in polygons_x] + [1])
+    pad_x = np.full([len(polygons_x), count], np.nan)
+    pad_y = np.full([len(polygons_y), count], np.nan)
+    for i, (p_x, p_y) in enumerate(zip(polygons_x, polygons_y)):
+        if len(p_x):
+            pad_x[i], pad_y[i] = p_x[-1], p_y[-1]
+            pad_x[i, :len(p_x)], pad_y[i, :len(p_y)] = p_x, p_y
+    return pad_x, pad_y
+
+
+def check_points_in_polygons(polygons_x: [[float]], polygons_y: [[float]], x: np.ndarray,
+                             y: np.ndarray) -> np.ndarray:
+    """ Many polygons against one shared set of points, result - (len(polygons), *x.shape) """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    edges = polygon_edges(*pad_polygons(polygons_x, polygons_y))
+    entry = ray_cast(*edges, x.ravel(), y.ravel())
+    return entry.reshape((len(polygons_x),) + x.shape)
+
+
+def check_own_points_in_polygons(polygons_x: [[float]], polygons_y: [[float]], x: np.ndarray,
+                                 y: np.ndarray) -> np.ndarray:
+    """ Polygon i against its own points x[i], y[i] - (len(polygons), N), nan points are outside """
+    edges = polygon_edges(*pad_polygons(polygons_x, polygons_y))
+    return ray_cast(*edges, np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
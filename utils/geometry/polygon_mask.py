@@ -0,0 +1,24 @@
+import numpy as np
+
+from utils.geometry.point_in_polygon import check_points_in_polygon
+
+
+def corners_in_polygon(curves_x: [float], curves_y: [float], size_x: int, size_y: int) -> np.ndarray:
+    grid_x, grid_y = np.meshgrid(np.arange(size_x), np.arange(size_y), indexing='ij')
+    return check_points_in_polygon(curves_x, curves_y, grid_x, grid_y)
+
+
+def polygon_cells_mask(curves_x: [float], curves_y: [float], size_x: int, size_y: int) -> np.ndarray:
+    """ Same as check_polygon_in_polygon for every unit cell [x, x + 1] * [y, y + 1] of the grid. """
+    if len(curves_x) == 0:
+        return np.zeros([size_x, size_y], dtype=bool)
+    corners = corners_in_polygon(curves_x, curves_y, size_x + 1, size_y + 1)
+    return corners[:-1, :-1] | corners[1:, :-1] | corners[:-1, 1:] | corners[1:, 1:]
+
+
+def rasterize_layer(curves_x: [float], curves_y: [float], z: int, roof: np.ndarray) -> \
+        (np.ndarray, np.ndarray, np.ndarray):
+    size_x, size_y = roof.shape
+    mask = polygon_cells_mask(curves_x, curves_y, size_x, size_y)
+    x, y = np.nonzero(mask)
+    return x, y, (z + roof[x, y]).astype(np.int64)
@@ -1,41 +1,38 @@
 from typing import Optional
 
-from utils.geometry.intersection_point_horizontal_plane import intersection_point_horizontal_plane
+import numpy as np
 
 
-def simplify_line(x: [float], y: [float], dot_count: Optional[int] = None) -> ([int], [int]):
+def simplify_lines(curves: [([float], [float])], dot_count: int) -> np.ndarray:
+    """ Every non-empty curve resampled to dot_count dots evenly spaced along its length,
+    (len(curves), dot_count, 2). Curve i is parametrized on [2 * i, 2 * i + 1]. """
+    lengths = np.array([min(len(x), len(y)) for x, y in curves], dtype=int)
+    x = np.concatenate([np.zeros(0)] + [np.asarray(x[:n], dtype=float)
+                                        for (x, _), n in zip(curves, lengths)])
+    y = np.concatenate([np.zeros(0)] + [np.asarray(y[:n], dtype=float)
+                                        for (_, y), n in zip(curves, lengths)])
+    curve = np.repeat(np.arange(len(curves)), lengths)
+
+    step = np.hypot(np.diff(x), np.diff(y))
+    step[curve[1:] != curve[:-1]] = 0
+    distance = np.concatenate([[0], np.cumsum(step)])
+    start, end = distance[np.cumsum(lengths) - lengths], distance[np.cumsum(lengths) - 1]
+    total = end - start
+    param = 2 * curve + (distance - start[curve]) / np.where(total > 0, total, 1)[curve]
+
+    query = 2 * np.arange(len(curves))[:, None] + np.outer(total > 0, np.linspace(0, 1, dot_count))
+    return np.stack([np.interp(query, param, x), np.interp(query, param, y)], axis=-1)
+
+
+def simplify_line(x: [float], y: [float], dot_count: Optional[int] = None) -> ([float], [float]):
     if not dot_count:
         dot_count = int(min(len(x), len(y)))
-
-    try:
-        x1, y1, total_len = x[0], y[0], 0
-        distance_to_dot = list()
-        for x2, y2 in zip(x, y):
-            total_len += ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-            distance_to_dot.append(total_len)
-            x1, y1 = x2, y2
-
-        total_len_main, total_len_simplify, step = 0, 0, total_len / (dot_count - 1)
-        simplify_x, simplify_y, x1, y1 = [], [], x[0], y[0]
-
-        for i in range(1, len(x)):
-            x1, x2, y1, y2 = x[i - 1], x[i], y[i - 1], y[i]
-            distance_between_dots = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5 + 0.000001
-            while round(distance_to_dot[i], 4) + 0.0001 >= round(total_len_simplify, 4):
-                percent = 1 - (distance_to_dot[i] - total_len_simplify) / distance_between_dots
-                total_len_simplify += step
-                x3, y3, _ = intersection_point_horizontal_plane([x1, y1, 0], [x2, y2, 1000], int(percent * 1000))
-                simplify_y.append(y3)
-                simplify_x.append(x3)
-
-        while len(simplify_x) > dot_count:
-            simplify_x.pop(-2)
-            simplify_y.pop(-2)
-
-        return simplify_x, simplify_y
-    except:
+    if not min(len(x), len(y)):
         return x, y
 
+    line = simplify_lines([(x, y)], dot_count)[0]
+    return line[:, 0].tolist(), line[:, 1].tolist()
+
 
 def polyline(a: (float, float), b: (float, float), scale_x: int = 1, scale_y: int = 1, accuracy=10000) \
         -> ([float], [float]):
@@ -1,6 +1,12 @@
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
 from InputData.mvc.Model.line_segment import PolygonalChain, LineSegment
 from InputData.mvc.Model.point import Point
-from utils.geometry.angle_line import intersection_segment_dot
+from utils.geometry.angle_line import intersection_segment_dot, intersection_segments
+from utils.geometry.point_in_polygon import check_own_points_in_polygons
 
 
 def rectangle(x: float, y: float) -> PolygonalChain:
@@ -61,3 +67,49 @@ def split_square(square: PolygonalChain, line: LineSegment) -> \
             real_split_line.a, real_split_line.b = real_split_line.b, real_split_line.a
 
     return chain1, chain2, real_split_line
+
+
+@lru_cache(maxsize=4096)
+def split_rectangle(x: float, y: float, a: (float, float), b: (float, float)) -> \
+        (([float], [float]), ([float], [float]), (Optional[float], Optional[float]),
+         (Optional[float], Optional[float])):
+    """ split_square of rectangle(x, y) by the line ab, the first part is on the left of ab """
+    line = LineSegment(Point(*a), Point(*b))
+    a_polygon, b_polygon, split_line = split_square(rectangle(x, y), line)
+
+    (x1, y1), (x2, y2) = a, b
+    a_sum = sum([(d.x - x1) * (y2 - y1) - (d.y - y1) * (x2 - x1) for d in a_polygon.dots])
+    b_sum = sum([(d.x - x1) * (y2 - y1) - (d.y - y1) * (x2 - x1) for d in b_polygon.dots])
+    if a_sum < 0 or b_sum > 0:
+        a_polygon, b_polygon = b_polygon, a_polygon
+
+    return tuple(map(tuple, a_polygon.get_x_y())), tuple(map(tuple, b_polygon.get_x_y())), \
+        (split_line.a.x, split_line.a.y), (split_line.b.x, split_line.b.y)
+
+
+def split_curves(curves: [np.ndarray], parts: [tuple]) -> ([np.ndarray], [np.ndarray]):
+    """ Closed curves (n, 2) cut by their split_rectangle parts in one pass. Dots of the part
+    are kept, the split line crossings are added to both parts. """
+    if not curves:
+        return [], []
+    count = max(len(curve) for curve in curves)
+    dots = np.full([len(curves), count, 2], np.nan)
+    for i, curve in enumerate(curves):
+        dots[i, :len(curve)] = curve
+    prev = np.concatenate([dots[:, :1], dots[:, :-1]], axis=1)
+
+    line = np.array([[np.nan if v is None else v for v in (*part[2], *part[3])]
+                     for part in parts]).reshape(-1, 4, 1)
+    x, y, found = intersection_segments(line[:, 0], line[:, 1], line[:, 2], line[:, 3],
+                                        prev[..., 0], prev[..., 1], dots[..., 0], dots[..., 1])
+    cross = np.stack([x, y], axis=-1)
+
+    result = []
+    for side in range(2):
+        inside = check_own_points_in_polygons([part[side][0] for part in parts],
+                                              [part[side][1] for part in parts],
+                                              dots[..., 0], dots[..., 1])
+        keep = np.stack([found, inside], axis=-1)
+        kept = np.stack([cross, dots], axis=2)[keep]
+        result.append(np.split(kept, np.cumsum(keep.sum(axis=(1, 2)))[:-1]))
+    return result[0], result[1]
@@ -0,0 +1,21 @@
+from typing import Callable
+
+Notifier = Callable[[str, str], None]
+
+
+def print_notification(title: str, text: str):
+    print(f'{title}: {text}')
+
+
+_notifier: Notifier = print_notification
+
+
+def set_notifier(notifier: Notifier) -> Notifier:
+    """ Replaces the handler of notify (message box in GUI), returns the previous one """
+    global _notifier
+    previous, _notifier = _notifier, notifier
+    return previous
+
+
+def notify(title: str, text: str):
+    _notifier(title, text)
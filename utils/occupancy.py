@@ -0,0 +1,37 @@
+import numpy as np
+
+
+class Occupancy:
+    __slots__ = 'cube'
+
+    def __init__(self, x: int, y: int, z: int):
+        self.cube = np.zeros([x, y, z], dtype=bool)
+
+    @property
+    def shape(self) -> (int, int, int):
+        return self.cube.shape
+
+    def in_bounds(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        x, y, z = np.asarray(x), np.asarray(y), np.asarray(z)
+        size_x, size_y, size_z = self.cube.shape
+        return (0 <= x) & (x < size_x) & (0 <= y) & (y < size_y) & (0 <= z) & (z < size_z)
+
+    def test(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """ Occupied cells, out of bounds cells are never free """
+        x, y, z = np.broadcast_arrays(x, y, z)
+        inside = self.in_bounds(x, y, z)
+        occupied = ~inside
+        occupied[inside] = self.cube[x[inside], y[inside], z[inside]]
+        return occupied
+
+    def claim(self, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """ Occupies the free cells (x, y, z must be unique) and returns which of them were free """
+        x, y, z = np.broadcast_arrays(x, y, z)
+        free = ~self.test(x, y, z)
+        self.cube[x[free], y[free], z[free]] = True
+        return free
+
+    def release(self, x: np.ndarray, y: np.ndarray, z: np.ndarray):
+        x, y, z = np.broadcast_arrays(x, y, z)
+        inside = self.in_bounds(x, y, z)
+        self.cube[x[inside], y[inside], z[inside]] = False
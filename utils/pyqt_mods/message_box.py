@@ -0,0 +1,8 @@
+from PyQt5.QtWidgets import QMessageBox
+
+
+def message_box(title: str, text: str):
+    msg = QMessageBox()
+    msg.setWindowTitle(title)
+    msg.setText(text)
+    msg.exec_()
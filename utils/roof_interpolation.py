@@ -0,0 +1,72 @@
+from typing import Callable
+
+import numpy as np
+from scipy.interpolate import CloughTocher2DInterpolator, LinearNDInterpolator, \
+    NearestNDInterpolator, RBFInterpolator, RegularGridInterpolator
+
+# grid nodes evaluated at once
+TILE_SIZE = 2 ** 16
+RBF_NEIGHBORS = 32
+
+Interpolator = Callable[[np.ndarray], np.ndarray]
+
+
+def clough_tocher(points: np.ndarray, values: np.ndarray) -> Interpolator:
+    """ cubic, outside of the convex hull the value of the nearest point instead of nan """
+    cubic = CloughTocher2DInterpolator(points, values)
+    nearest = NearestNDInterpolator(points, values)
+
+    def interpolator(xi: np.ndarray) -> np.ndarray:
+        result = cubic(xi)
+        outside = np.isnan(result)
+        result[outside] = nearest(xi[outside])
+        return result
+    return interpolator
+
+
+def rbf(points: np.ndarray, values: np.ndarray) -> Interpolator:
+    """ Thin plate spline over the RBF_NEIGHBORS nearest points, repeated points are skipped """
+    points, index = np.unique(points, axis=0, return_index=True)
+    return RBFInterpolator(points, np.asarray(values, dtype=float)[index],
+                           neighbors=min(RBF_NEIGHBORS, len(points)))
+
+
+def bilinear(points: np.ndarray, values: np.ndarray) -> Interpolator:
+    """ Corners only: points[:4] are (0, 0), (0, base), (base, 0), (base, base) """
+    axis = (points[0, 0], points[3, 0]), (points[0, 1], points[3, 1])
+    return RegularGridInterpolator(axis, np.asarray(values[:4], dtype=float).reshape(2, 2),
+                                   bounds_error=False, fill_value=None)
+
+
+# method: (points (n, 2), values (n)) -> interpolator of xi (m, 2)
+interpolators = {
+    'cubic': lambda points, values: CloughTocher2DInterpolator(points, values),
+    'linear': lambda points, values: LinearNDInterpolator(points, values),
+    'nearest': lambda points, values: NearestNDInterpolator(points, values),
+    'clough_tocher': clough_tocher,
+    'rbf': rbf,
+    'bilinear': bilinear,
+}
+
+
+def interpolate(points: np.ndarray, values: np.ndarray, x: np.ndarray, y: np.ndarray,
+                method: str = 'cubic', tile: int = TILE_SIZE) -> np.ndarray:
+    """ Same as griddata(points, values, (x, y), method) for cubic, linear and nearest """
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    interpolator = interpolators[method](np.asarray(points, dtype=float), np.asarray(values))
+    xi = np.stack([x.ravel(), y.ravel()], axis=-1)
+    tiles = [interpolator(xi[start:start + tile]) for start in range(0, len(xi), tile)]
+    return np.concatenate(tiles or [np.zeros(0)]).reshape(x.shape)
+
+
+def interpolate_grid(points: np.ndarray, values: np.ndarray, base: float, method: str = 'cubic',
+                     tile: int = TILE_SIZE) -> np.ndarray:
+    """ Values on np.mgrid[0:base:1, 0:base:1], evaluated by tiles of rows """
+    interpolator = interpolators[method](np.asarray(points, dtype=float), np.asarray(values))
+    column = np.arange(base, dtype=float)
+    rows, tiles = max(1, tile // max(1, len(column))), []
+    for start in range(0, len(column), rows):
+        x = column[start:start + rows]
+        xi = np.stack(np.meshgrid(x, column, indexing='ij'), axis=-1).reshape(-1, 2)
+        tiles.append(interpolator(xi).reshape(len(x), len(column)))
+    return np.concatenate(tiles or [np.zeros([0, 0])])
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def run_bounds(data: np.ndarray) -> (np.ndarray, np.ndarray):
+    """ Masks of the first and the last cell of every run of True along the last axis """
+    step = np.diff(data.astype(np.int8), prepend=0, append=0, axis=-1)
+    return step[..., :-1] == 1, step[..., 1:] == -1
+
+
+def short_runs(data: np.ndarray, min_length: int, keep_last: bool = True) -> np.ndarray:
+    """ Cells of the runs shorter than min_length, the run at the end of the axis is kept """
+    starts, ends = run_bounds(data)
+    if keep_last:
+        ends[..., -1] = False
+
+    size = data.shape[-1]
+    index = np.arange(size, dtype=np.int16 if size < 2 ** 15 else np.int32)
+    start = np.maximum.accumulate(np.where(starts, index, 0), axis=-1)
+    end = np.where(ends, index, size)[..., ::-1]
+    end = np.minimum.accumulate(end, axis=-1)[..., ::-1]
+    return data & (end < size) & (end - start + 1 < min_length)
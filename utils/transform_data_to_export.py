@@ -1,22 +1,130 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+from utils.run_length import run_bounds
+
+X, Y, S, E, BODY = range(5)
+
+
+def cube_intervals(data: np.ndarray) -> np.ndarray:
+    """ Runs of True along z of a (x, y, z) cube as rows (x, y, s, e) """
+    starts, ends = run_bounds(np.asarray(data, dtype=bool))
+    x, y, s = np.nonzero(starts)
+    return np.stack([x, y, s, np.nonzero(ends)[2]], axis=1).astype(np.int32)
+
+
+class IntervalTable:
+    """ Rows (x, y, s, e, body) sorted by column, offsets[x * size_y + y] - first row of column """
+    __slots__ = 'body_names', 'size_x', 'size_y', '_rows', '_offsets'
+
+    def __init__(self, size_x: int = 0, size_y: int = 0):
+        self.body_names: [str] = []
+        self.size_x, self.size_y = size_x, size_y
+        self._rows = np.zeros([0, 5], dtype=np.int32)
+        self._offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def rows(self) -> np.ndarray:
+        self.__index()
+        return self._rows
+
+    @property
+    def offsets(self) -> np.ndarray:
+        self.__index()
+        return self._offsets
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.rows[:, X]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.rows[:, Y]
+
+    @property
+    def s(self) -> np.ndarray:
+        return self.rows[:, S]
+
+    @property
+    def e(self) -> np.ndarray:
+        return self.rows[:, E]
+
+    @property
+    def body(self) -> np.ndarray:
+        return self.rows[:, BODY]
+
+    def copy(self) -> IntervalTable:
+        table = IntervalTable(self.size_x, self.size_y)
+        table.body_names = self.body_names.copy()
+        table._rows, table._offsets = self.rows, self.offsets
+        return table
+
+    def body_id(self, name: str) -> int:
+        if name not in self.body_names:
+            self.body_names.append(name)
+        return self.body_names.index(name)
+
+    def add_rows(self, name: str, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=np.int32).reshape(-1, 4)
+        body = np.full([len(rows), 1], self.body_id(name), dtype=np.int32)
+        self._rows = np.concatenate([self._rows, np.concatenate([rows, body], axis=1)])
+        self._offsets = None
+
+    def add_cube(self, name: str, data: np.ndarray):
+        self.add_rows(name, cube_intervals(data))
+
+    def __index(self):
+        if self._offsets is not None:
+            return
+        rows = self._rows
+        if len(rows):
+            self.size_x = max(self.size_x, int(rows[:, X].max()) + 1)
+            self.size_y = max(self.size_y, int(rows[:, Y].max()) + 1)
+        column = rows[:, X].astype(np.int64) * self.size_y + rows[:, Y]
+        order = np.lexsort((rows[:, S], rows[:, BODY], column))
+        self._rows = rows[order]
+        self._offsets = np.searchsorted(column[order], np.arange(self.size_x * self.size_y + 1))
+
+    def column(self, x: int, y: int) -> np.ndarray:
+        if not (0 <= x < self.size_x and 0 <= y < self.size_y):
+            return self._rows[:0]
+        offsets, column = self.offsets, x * self.size_y + y
+        return self._rows[offsets[column]:offsets[column + 1]]
+
+    def column_counts(self) -> np.ndarray:
+        """ Filled cells per column as a (size_x, size_y) array """
+        counts = np.diff(np.cumsum(np.concatenate([[0], self.e - self.s + 1]))[self.offsets])
+        return counts.reshape(self.size_x, self.size_y)
+
+    def to_dict(self, str_keys: bool = False) -> dict:
+        key: () = str if str_keys else int
+        rows = self.rows[np.argsort(self.body, kind='stable')]
+        data = {}
+        for x, y, s, e, body in rows.tolist():
+            body_data = data.setdefault(self.body_names[body], {})
+            body_data.setdefault(key(x), {}).setdefault(key(y), []).append({'s': s, 'e': e})
+        return data
+
+    @staticmethod
+    def from_dict(data: dict, size_x: int = 0, size_y: int = 0) -> IntervalTable:
+        table = IntervalTable(size_x, size_y)
+        for name, body_data in data.items():
+            rows = [(int(x), int(y), s_e['s'], s_e['e']) for x, column in body_data.items()
+                    for y, intervals in column.items() for s_e in intervals]
+            table.add_rows(name, rows)
+        return table
+
+
 def transform_data(data: []) -> dict:
-    map_dict = {}
-    for i in range(len(data)):
-        map_dict[i] = {}
-        for j in range(len(data[i])):
-            start = False
-            map_dict[i][j] = []
-            for k in range(len(data[i][j])):
-                if data[i][j][k] and not start:
-                    start = True
-                    map_dict[i][j].append({'s': k, 'e': len(data[i][j])-1})
-                elif not data[i][j][k] and start:
-                    start = False
-                    map_dict[i][j][-1]['e'] = k - 1
-            if not map_dict[i][j]:
-                map_dict[i].pop(j)
-        if map_dict[i] == {}:
-            map_dict.pop(i)
-    return map_dict
+    table = IntervalTable()
+    table.add_cube('', data)
+    return table.to_dict().get('', {})
 
 
 def dict_update(old: dict, new: dict) -> dict: